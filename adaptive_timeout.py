@@ -0,0 +1,65 @@
+"""
+自适应超时：按每个工具（或请求类型）最近的响应耗时计算超时时间
+  - 每个键保留最近 window 次耗时（滚动窗口），超时 = 第 percentile 百分位耗时 × multiplier，限制在 [floor, ceiling] 之间
+  - 样本数不足 min_samples 时使用 default（通常是配置的固定超时）
+  - 超时的调用按已等待的时间记为一个样本，下次的超时随之放大，慢工具不会一直被过早终止
+快的工具很快失败，慢的工具有足够的时间；只使用标准库
+"""
+
+import math
+from collections import deque
+from typing import Dict, Any, Deque, Hashable, Optional
+
+
+class AdaptiveTimeouts:
+    def __init__(self, default: float, floor: float = 1.0, ceiling: float = 300.0, multiplier: float = 3.0,
+                 percentile: float = 99.0, window: int = 200, min_samples: int = 20):
+        if floor > ceiling:
+            raise ValueError(f"超时下限 {floor} 大于上限 {ceiling}")
+        self.default = default  # 样本不足时的超时（秒）
+        self.floor = floor  # 超时下限（秒）
+        self.ceiling = ceiling  # 超时上限（秒）
+        self.multiplier = multiplier  # 百分位耗时的倍数
+        self.percentile = percentile
+        self.window = window  # 每个键保留的最近样本数
+        self.min_samples = min_samples  # 开始自适应所需的最少样本数
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        self._cache: Dict[Hashable, float] = {}  # 键 -> 已计算的超时，新样本到达时失效
+
+    def observe(self, key: Hashable, seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._cache.pop(key, None)
+
+    def latency(self, key: Hashable) -> Optional[float]:
+        """第 percentile 百分位耗时（就近取秩），没有样本时返回None"""
+        samples = self._samples.get(key)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(math.ceil(self.percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def timeout(self, key: Hashable) -> float:
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return self.default
+        value = min(max(self.latency(key) * self.multiplier, self.floor), self.ceiling)
+        self._cache[key] = value
+        return value
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """各键的样本数、百分位耗时和当前超时，用于调试和基准输出"""
+        return {
+            str(key): {
+                "samples": len(samples),
+                f"p{self.percentile:g}_ms": round(self.latency(key) * 1000, 3),
+                "timeout_s": round(self.timeout(key), 3),
+            }
+            for key, samples in self._samples.items()
+        }
@@ -0,0 +1,4 @@
+"""
+MCP 服务端/客户端离线基准测试工具集
+运行方式: python -m bench --help
+"""
@@ -0,0 +1,263 @@
+"""
+基准测试命令行入口
+  python -m bench servers   # 服务端负载测试
+  python -m bench client    # MCPClient 端到端测试（使用本地 Mock LLM）
+  python -m bench startup   # 服务端冷启动耗时与模块导入耗时
+  python -m bench dispatch  # 服务端进程内每次调用的分发开销
+  python -m bench arrays    # 大数组参数：JSON 与共享内存句柄的端到端对比
+  python -m bench parse     # 从LLM回复中提取工具调用的正确率与耗时
+  python -m bench record    # 透明代理服务端stdio并录制流量
+  python -m bench replay    # 回放录制的流量，对比延迟
+  python -m bench compare   # 对比两次结果，检测性能回退
+"""
+
+import asyncio
+import os
+import sys
+
+import click
+
+from bench.common import REPO_ROOT, git_revision, load_results, write_results
+
+
+def _default_output(kind: str) -> str:
+    return os.path.join(REPO_ROOT, "bench", "results", f"{kind}-{git_revision() or 'local'}.json")
+
+
+@click.group()
+def cli():
+    """MCP 离线基准测试工具"""
+
+
+@cli.command("servers")
+@click.option("--server", "servers", multiple=True, help="要测试的服务端（可重复），默认全部")
+@click.option("--requests", "requests_total", default=500, show_default=True, help="每个场景的请求总数")
+@click.option("--concurrency", default=8, show_default=True, help="同时在途的请求数")
+@click.option("--list-ratio", default=0.2, show_default=True, help="tools/list 请求占比（其余为 tools/call）")
+@click.option("--payload-bytes", "payload_sizes", multiple=True, type=int, default=[0], show_default=True,
+              help="tools/call 参数附加的填充字节数（可重复，每个值一个场景）")
+@click.option("--warmup", default=20, show_default=True, help="正式计时前的预热请求数")
+@click.option("--seed", default=0, show_default=True, help="请求组合的随机种子")
+@click.option("--timeout", default=30.0, show_default=True, help="单个请求超时时间（秒）")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/servers-<提交号>.json")
+def servers_command(servers, requests_total, concurrency, list_ratio, payload_sizes, warmup, seed, timeout, output):
+    """启动各服务端入口并施加负载，统计吞吐量、延迟分位数和RSS"""
+    from bench.servers import SERVERS, run_benchmark
+
+    selected = list(servers) or list(SERVERS.keys())
+    unknown = [name for name in selected if name not in SERVERS]
+    if unknown:
+        raise click.BadParameter(f"未知服务端: {', '.join(unknown)}（可选: {', '.join(SERVERS)}）")
+
+    config = {
+        "servers": selected,
+        "requests": requests_total,
+        "concurrency": concurrency,
+        "list_ratio": list_ratio,
+        "payload_bytes": list(payload_sizes),
+        "warmup": warmup,
+        "seed": seed,
+        "timeout": timeout,
+    }
+    results = asyncio.run(run_benchmark(
+        selected, requests_total, concurrency, list_ratio, list(payload_sizes), warmup, seed, timeout,
+        echo=click.echo,
+    ))
+    output = output or _default_output("servers")
+    write_results(output, "servers", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+
+
+@cli.command("client")
+@click.option("--server", "server_path", default="mcp_server.py", show_default=True, help="客户端连接的服务端脚本")
+@click.option("--corpus", default=None, help="查询语料JSONL，默认 bench/corpus/queries.jsonl")
+@click.option("--repeat", default=3, show_default=True, help="语料重复回放次数")
+@click.option("--llm-latency-ms", default=0.0, show_default=True, help="Mock LLM 每次响应的模拟延迟（毫秒）")
+@click.option("--script", "script_path", default=None, help="Mock LLM 响应脚本JSON，默认使用内置计算器脚本")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/client-<提交号>.json")
+def client_command(server_path, corpus, repeat, llm_latency_ms, script_path, output):
+    """通过 process_query 回放查询语料，统计客户端各阶段耗时"""
+    from bench.client import DEFAULT_CORPUS, load_corpus, run_client_benchmark
+    from mock_llm_server import load_script
+
+    corpus = corpus or DEFAULT_CORPUS
+    queries = load_corpus(corpus)
+    config = {
+        "server": server_path,
+        "corpus": os.path.relpath(corpus, REPO_ROOT),
+        "queries": len(queries),
+        "repeat": repeat,
+        "llm_latency_ms": llm_latency_ms,
+        "script": script_path,
+    }
+    results = asyncio.run(run_client_benchmark(
+        server_path, queries, repeat, llm_latency_ms, load_script(script_path), echo=click.echo
+    ))
+    output = output or _default_output("client")
+    write_results(output, "client", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+
+
+@cli.command("startup")
+@click.option("--server", "servers", multiple=True, help="要测试的服务端（可重复），默认全部")
+@click.option("--runs", default=20, show_default=True, help="每个服务端的启动次数")
+@click.option("--warmup", default=2, show_default=True, help="正式计时前的预热轮数")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/startup-<提交号>.json")
+def startup_command(servers, runs, warmup, output):
+    """测量服务端从启动到首个响应的冷启动耗时，并汇总 -X importtime 导入耗时"""
+    from bench.servers import SERVERS
+    from bench.startup import COLD_START_TARGET_MS, run_startup_benchmark
+
+    selected = list(servers) or list(SERVERS.keys())
+    unknown = [name for name in selected if name not in SERVERS]
+    if unknown:
+        raise click.BadParameter(f"未知服务端: {', '.join(unknown)}（可选: {', '.join(SERVERS)}）")
+
+    config = {"servers": selected, "runs": runs, "warmup": warmup, "target_ms": COLD_START_TARGET_MS}
+    results = run_startup_benchmark(selected, runs, warmup, echo=click.echo)
+    if "mcp_server" in results:
+        over = results["mcp_server"]["over_interpreter_p50_ms"]
+        status = "✅ 达到" if over <= COLD_START_TARGET_MS else "❌ 未达到"
+        click.echo(f"{status} mcp_server 冷启动目标：解释器之外 {over:.1f}ms / 目标 {COLD_START_TARGET_MS:.0f}ms")
+    output = output or _default_output("startup")
+    write_results(output, "startup", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+
+
+@cli.command("dispatch")
+@click.option("--calls", default=2000, show_default=True, help="每轮调用次数")
+@click.option("--rounds", default=7, show_default=True, help="测量轮数（取每次调用耗时的中位数）")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/dispatch-<提交号>.json")
+def dispatch_command(calls, rounds, output):
+    """在进程内测量 mcp_server 每次请求的分发与序列化开销"""
+    from bench.dispatch import run_dispatch_benchmark
+
+    config = {"calls": calls, "rounds": rounds}
+    results = run_dispatch_benchmark(calls, rounds, echo=click.echo)
+    output = output or _default_output("dispatch")
+    write_results(output, "dispatch", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+
+
+@cli.command("parse")
+@click.option("--corpus", default=None, help="回复语料JSONL，默认 bench/corpus/replies.jsonl")
+@click.option("--rounds", default=200, show_default=True, help="测量轮数（每轮解析全部回复）")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/parse-<提交号>.json")
+def parse_command(corpus, rounds, output):
+    """用回复语料对比新旧工具调用解析方式的正确率和每条回复的解析耗时；extract 有解析错误时退出码为1"""
+    from bench.parse import DEFAULT_REPLIES, load_replies, run_parse_benchmark
+
+    corpus = corpus or DEFAULT_REPLIES
+    config = {"corpus": os.path.relpath(corpus, REPO_ROOT), "rounds": rounds}
+    results = run_parse_benchmark(load_replies(corpus), rounds, echo=click.echo)
+    output = output or _default_output("parse")
+    write_results(output, "parse", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+    if results["extract"]["failures"]:
+        sys.exit(1)
+
+
+@cli.command("arrays")
+@click.option("--server", default="mcp_server", show_default=True, help="测试的服务端（需提供 statistics 工具）")
+@click.option("--size", "sizes", multiple=True, type=int, default=[10000, 1000000], show_default=True,
+              help="数组元素个数（可重复，每个值一个场景）")
+@click.option("--repeat", default=5, show_default=True, help="每个场景的调用次数")
+@click.option("--seed", default=0, show_default=True, help="数组内容的随机种子")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/arrays-<提交号>.json")
+def arrays_command(server, sizes, repeat, seed, output):
+    """以JSON列表和共享内存句柄两种方式传入大数组，对比 statistics 工具调用的端到端延迟"""
+    from bench.arrays import run_arrays_benchmark
+    from bench.servers import SERVERS
+
+    if server not in SERVERS or not SERVERS[server]["persistent"]:
+        raise click.BadParameter(f"未知或不支持的服务端: {server}")
+    config = {"server": server, "sizes": list(sizes), "repeat": repeat, "seed": seed}
+    results = asyncio.run(run_arrays_benchmark(server, list(sizes), repeat, seed, echo=click.echo))
+    output = output or _default_output("arrays")
+    write_results(output, "arrays", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+
+
+@cli.command("record", context_settings={"ignore_unknown_options": True})
+@click.option("--log", "log_path", required=True, help="流量日志JSONL路径")
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+def record_command(log_path, command):
+    """
+    作为服务端命令的透明代理运行并录制流量，例如：
+    python -m bench record --log traffic.jsonl -- python caculator_mcp_server.py
+    """
+    from bench.traffic import record_proxy, resolve_command
+
+    # stdout 是转发给客户端的协议通道，这里不能输出任何其他内容
+    sys.exit(asyncio.run(record_proxy(resolve_command(list(command)), log_path)))
+
+
+@cli.command("replay")
+@click.argument("log_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("command", nargs=-1, type=click.UNPROCESSED)
+@click.option("--speed", default=1.0, show_default=True, help="回放倍速（2表示以一半的时间间隔发送，0表示不等待）")
+@click.option("--timeout", default=30.0, show_default=True, help="等待单个响应的超时时间（秒）")
+@click.option("--output", default=None, help="结果JSON路径，默认 bench/results/replay-<提交号>.json")
+def replay_command(log_path, command, speed, timeout, output):
+    """按录制的时间间隔把客户端消息发给服务端（默认为录制时的命令），对比各操作的延迟"""
+    from bench.traffic import load_traffic, recorded_exchanges, replay_traffic, resolve_command
+
+    header, records = load_traffic(log_path)
+    command = resolve_command(list(command)) if command else header.get("command")
+    if not command:
+        raise click.BadParameter("日志中没有服务端命令，请在日志路径之后给出")
+    exchanges = recorded_exchanges(records)
+    click.echo(f"▶️ 回放 {len(exchanges)} 条客户端消息（倍速 {speed}）: {' '.join(command)}")
+    results = asyncio.run(replay_traffic(command, exchanges, speed, timeout, echo=click.echo))
+    config = {"log": os.path.abspath(log_path), "command": command, "speed": speed, "timeout": timeout}
+    output = output or _default_output("replay")
+    write_results(output, "replay", config, results)
+    click.echo(f"📄 结果已写入 {output}")
+    if results["missing_responses"]:
+        sys.exit(1)
+
+
+def _iter_metrics(results, prefix=""):
+    """展开嵌套结果，产出 (路径, 指标名, 数值)"""
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _iter_metrics(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, key, value
+
+
+# 数值越大越好的指标，其余（延迟、内存、耗时）越小越好
+HIGHER_IS_BETTER = {"throughput_rps", "queries_per_s", "calls_per_s"}
+COMPARED_SUFFIXES = ("_ms", "_rps", "_kb", "_per_s", "_us")
+
+
+@cli.command("compare")
+@click.argument("baseline", type=click.Path(exists=True))
+@click.argument("candidate", type=click.Path(exists=True))
+@click.option("--threshold", default=0.10, show_default=True, help="判定回退的相对变化阈值")
+def compare_command(baseline, candidate, threshold):
+    """对比两个结果文件，超过阈值的回退以非零退出码报告"""
+    old = dict((path, value) for path, _, value in _iter_metrics(load_results(baseline)["results"]))
+    regressions = 0
+    for path, metric, new_value in _iter_metrics(load_results(candidate)["results"]):
+        if not metric.endswith(COMPARED_SUFFIXES) or path not in old:
+            continue
+        old_value = old[path]
+        if old_value == 0:
+            continue
+        change = (new_value - old_value) / old_value
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        flag = "❌" if worse > threshold else ("✅" if worse < -threshold else "  ")
+        if worse > threshold:
+            regressions += 1
+        click.echo(f"{flag} {path:<70} {old_value:>12.3f} -> {new_value:>12.3f} ({change:+.1%})")
+
+    if regressions:
+        click.echo(f"发现 {regressions} 项性能回退（阈值 {threshold:.0%}）")
+        sys.exit(1)
+    click.echo("未发现性能回退")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,64 @@
+"""
+大数组参数传递基准：同一个 statistics 工具调用，分别以JSON数字列表和共享内存句柄（shared_arrays）传入数组，
+通过 ServerConnection 经stdio往返，对比端到端延迟。JSON 路径包含客户端序列化、管道传输和服务端解析；
+共享内存路径包含把数组复制进共享内存和服务端映射
+"""
+
+import array
+import os
+import random
+import sys
+import time
+from typing import Dict, Any, List
+
+from bench.common import REPO_ROOT, latency_summary
+from bench.servers import SERVERS
+from mcp_client import JSONRPC, SIMPLE, ServerConnection
+from shared_arrays import SharedArrays
+
+
+async def run_arrays_benchmark(server: str, sizes: List[int], repeat: int, seed: int, echo=print) -> Dict[str, Any]:
+    spec = SERVERS[server]
+    connection = ServerConnection(
+        [sys.executable, os.path.join(REPO_ROOT, spec["script"])],
+        request_timeout=300,
+        protocol=JSONRPC if spec["protocol"] == "jsonrpc" else SIMPLE,
+    )
+    await connection.start()
+    random.seed(seed)
+    results: Dict[str, Any] = {}
+    try:
+        for size in sizes:
+            data = array.array("d", (random.random() for _ in range(size)))
+            timings: Dict[str, List[float]] = {"json": [], "shared": []}
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await connection.send_request(
+                    {"type": "call_tool", "name": "statistics", "arguments": {"values": data.tolist()}})
+                timings["json"].append(time.perf_counter() - started)
+                if response.get("type") == "error":
+                    raise RuntimeError(f"JSON 调用失败: {response.get('message')}")
+
+                started = time.perf_counter()
+                with SharedArrays() as arrays:
+                    response = await connection.send_request(
+                        {"type": "call_tool", "name": "statistics", "arguments": {"values": arrays.share(data)}})
+                timings["shared"].append(time.perf_counter() - started)
+                if response.get("type") == "error":
+                    raise RuntimeError(f"共享内存调用失败: {response.get('message')}")
+
+            json_summary = latency_summary(timings["json"])
+            shared_summary = latency_summary(timings["shared"])
+            results[f"size_{size}"] = {
+                "payload_kb": round(size * 8 / 1024, 1),
+                "json": json_summary,
+                "shared": shared_summary,
+            }
+            echo(
+                f"{size:>10} 个float64  JSON p50={json_summary['p50_ms']:.1f}ms  "
+                f"共享内存 p50={shared_summary['p50_ms']:.1f}ms  "
+                f"({json_summary['p50_ms'] / max(shared_summary['p50_ms'], 1e-9):.1f}x)"
+            )
+    finally:
+        await connection.close()
+    return results
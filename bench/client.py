@@ -0,0 +1,143 @@
+"""
+MCPClient 端到端离线基准测试
+使用内置的 mock_llm_server 代替真实大模型，把查询语料逐条送入 process_query，
+统计总耗时，并拆分为 LLM 调用、工具往返、提示词构建、工具调用解析等各部分耗时，
+从而单独衡量客户端自身的开销。
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from bench.common import REPO_ROOT, latency_summary
+
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "bench", "corpus", "queries.jsonl")
+
+# 被计时的 MCPClient 方法 -> 报告中的阶段名
+# _get_final_response 内部会调用 call_llm，因此只统计 call_llm，避免重复计算
+PHASES = {
+    "_build_system_prompt": "build_prompt",
+    "call_llm": "llm",
+    "_parse_tool_calls": "parse_tool_calls",
+    "call_tool": "tool_roundtrip",
+    "_format_tool_response": "format_tool_response",
+}
+
+
+def load_corpus(path: str) -> List[str]:
+    """读取JSONL查询语料，每行 {"query": "..."}，也接受纯字符串行"""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            queries.append(item["query"] if isinstance(item, dict) else str(item))
+    return queries
+
+
+class PhaseTimer:
+    """包装客户端实例方法，按阶段累计耗时"""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.current: Dict[str, float] = {}
+
+    def install(self) -> None:
+        for method_name, phase in PHASES.items():
+            original = getattr(self.client, method_name)
+            setattr(self.client, method_name, self._wrap(original, phase))
+
+    def _wrap(self, original, phase: str):
+        if asyncio.iscoroutinefunction(original):
+            async def timed_async(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    self.current[phase] = self.current.get(phase, 0.0) + time.perf_counter() - started
+            return timed_async
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.current[phase] = self.current.get(phase, 0.0) + time.perf_counter() - started
+        return timed
+
+    def take(self) -> Dict[str, float]:
+        phases, self.current = self.current, {}
+        return phases
+
+
+async def run_client_benchmark(
+    server_path: str,
+    queries: List[str],
+    repeat: int,
+    llm_latency_ms: float,
+    script: Optional[Dict[str, Any]] = None,
+    echo=print,
+) -> Dict[str, Any]:
+    # 延迟导入：bench 的其他命令不需要 aiohttp/客户端依赖
+    from mcp_client import LLMConfig, MCPClient
+    from mock_llm_server import DEFAULT_SCRIPT, MockLLMServer
+
+    script = dict(script or DEFAULT_SCRIPT)
+    script["latency_ms"] = llm_latency_ms
+    mock = MockLLMServer(script)
+    base_url = await mock.start()
+
+    client = MCPClient(LLMConfig(api_key="mock", base_url=base_url, model_name="mock"))
+    samples: List[Dict[str, float]] = []
+    answers: List[str] = []
+    try:
+        # 客户端会向 stdout 打印大量调试信息，压测期间屏蔽
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            connect_started = time.perf_counter()
+            if not await client.connect(os.path.join(REPO_ROOT, server_path)):
+                raise RuntimeError(f"无法连接到服务端 {server_path}")
+            connect_time = time.perf_counter() - connect_started
+
+            timer = PhaseTimer(client)
+            timer.install()
+            for _ in range(repeat):
+                for query in queries:
+                    started = time.perf_counter()
+                    answers.append(await client.process_query(query))
+                    total = time.perf_counter() - started
+                    phases = timer.take()
+                    phases["total"] = total
+                    # 客户端自身开销 = 总耗时 - 等待LLM - 工具往返
+                    phases["client_overhead"] = total - phases.get("llm", 0.0) - phases.get("tool_roundtrip", 0.0)
+                    samples.append(phases)
+    finally:
+        if client.connected:
+            await client.disconnect()
+        elif not client.session.closed:
+            await client.session.close()
+        await mock.stop()
+
+    phase_names = ["total", "client_overhead"] + list(PHASES.values())
+    breakdown = {
+        name: latency_summary([s.get(name, 0.0) for s in samples]) for name in phase_names
+    }
+    total_time = sum(s["total"] for s in samples)
+    for name in phase_names:
+        share = sum(s.get(name, 0.0) for s in samples) / total_time if total_time else 0.0
+        breakdown[name]["share"] = round(share, 4)
+        echo(f"{name:<22} p50={breakdown[name].get('p50_ms', 0):>9.3f}ms "
+             f"p99={breakdown[name].get('p99_ms', 0):>9.3f}ms  占比={share:.1%}")
+
+    return {
+        "queries": len(samples),
+        "connect_ms": round(connect_time * 1000, 3),
+        "queries_per_s": round(len(samples) / total_time, 2) if total_time else 0.0,
+        "llm_requests": mock.llm.requests,
+        "phases": breakdown,
+        "sample_answers": answers[:5],
+    }
@@ -0,0 +1,97 @@
+"""基准测试公共工具：统计、进程内存采样、结果读写"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+# 仓库根目录（bench/ 的上一级），用于定位服务端脚本
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """线性插值百分位数，输入必须已排序"""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    frac = rank - low
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * frac
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """把秒级延迟列表汇总为毫秒统计"""
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+def read_rss_kb(pid: int) -> Dict[str, Optional[int]]:
+    """读取进程当前/峰值常驻内存（KB），仅Linux的/proc可用，其他平台返回None"""
+    result: Dict[str, Optional[int]] = {"rss_kb": None, "peak_rss_kb": None}
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    result["rss_kb"] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    result["peak_rss_kb"] = int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return result
+
+
+def git_revision() -> Optional[str]:
+    """当前提交号，用于在不同提交之间对比结果"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, kind: str, config: Dict[str, Any], results: Dict[str, Any]) -> None:
+    """写出机器可读的结果文件（JSON）"""
+    document = {
+        "kind": kind,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "environment": environment_info(),
+        "config": config,
+        "results": results,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
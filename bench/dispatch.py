@@ -0,0 +1,74 @@
+"""
+服务端分发开销微基准
+在进程内直接驱动 MCPServer（不经过stdio和子进程），测量每次调用的 handle_request + 响应序列化耗时：
+  - list_tools: 工具列表请求
+  - call_tool:  addition 工具调用（包含线程池执行）
+  - direct:     直接调用工具函数，作为基线
+call_tool 与 direct 之差即为服务端每次调用的分发开销
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Callable
+
+from bench.common import percentile
+
+
+def _measure(run_batch: Callable[[int], float], calls: int, rounds: int) -> Dict[str, float]:
+    """执行 rounds 轮、每轮 calls 次调用，返回每次调用耗时（微秒）的统计"""
+    per_call = sorted(run_batch(calls) / calls * 1e6 for _ in range(rounds))
+    return {
+        "calls": calls * rounds,
+        "p50_us": round(percentile(per_call, 50), 3),
+        "min_us": round(per_call[0], 3),
+        "calls_per_s": round(1e6 / percentile(per_call, 50), 1),
+    }
+
+
+def run_dispatch_benchmark(calls: int, rounds: int, echo=print) -> Dict[str, Any]:
+    from calculator_tools import addition
+    from mcp_server import DEFAULT_TOOLS_MANIFEST, MCPServer
+
+    server = MCPServer(name="bench", version="0.0.0")
+    server.debug = False
+    server.load_tools(DEFAULT_TOOLS_MANIFEST)
+    list_request = {"type": "list_tools", "id": 1}
+    call_request = {"type": "call_tool", "name": "addition", "arguments": {"a": 1, "b": 2}, "id": 2}
+
+    loop = asyncio.new_event_loop()
+
+    def server_batch(request: Dict[str, Any]) -> Callable[[int], float]:
+        async def batch(n: int) -> float:
+            started = time.perf_counter()
+            for _ in range(n):
+                response = await server.handle_request(request)
+                response["id"] = request["id"]
+                server.encode_response(response)
+            return time.perf_counter() - started
+        return lambda n: loop.run_until_complete(batch(n))
+
+    def direct_batch(n: int) -> float:
+        args = call_request["arguments"]
+        started = time.perf_counter()
+        for _ in range(n):
+            addition(args)
+        return time.perf_counter() - started
+
+    try:
+        # 预热：加载延迟导入的工具实现，启动线程池
+        for request in (list_request, call_request):
+            server_batch(request)(max(calls // 10, 1))
+        results: Dict[str, Any] = {
+            "list_tools": _measure(server_batch(list_request), calls, rounds),
+            "call_tool": _measure(server_batch(call_request), calls, rounds),
+            "direct": _measure(direct_batch, calls, rounds),
+        }
+    finally:
+        loop.close()
+
+    results["call_overhead_us"] = round(results["call_tool"]["p50_us"] - results["direct"]["p50_us"], 3)
+    for name in ("list_tools", "call_tool", "direct"):
+        stats = results[name]
+        echo(f"{name:<12} p50={stats['p50_us']:.2f}us min={stats['min_us']:.2f}us ({stats['calls_per_s']:.0f} calls/s)")
+    echo(f"{'overhead':<12} {results['call_overhead_us']:.2f}us/调用（call_tool - direct）")
+    return results
@@ -0,0 +1,80 @@
+"""
+工具调用解析基准：用回复语料（bench/corpus/replies.jsonl，每行 {"id", "reply", "expected"}）对比
+  - legacy:  原来的解析方式，只识别整条回复恰好是 ```json 代码块的情况，否则对整条回复 json.loads
+  - extract: tool_calls.extract_tool_calls，一次扫描提取任意位置的JSON
+统计每种方式解析正确的条数，以及每条回复的平均解析耗时（微秒）。语料同时作为 extract 的回归检查：
+有条目解析结果与 expected 不一致时逐条列出
+"""
+
+import json
+import os
+import time
+from typing import Dict, Any, Callable, List
+
+from bench.common import REPO_ROOT, percentile
+from tool_calls import extract_tool_calls
+
+DEFAULT_REPLIES = os.path.join(REPO_ROOT, "bench", "corpus", "replies.jsonl")
+
+
+def legacy_parse(content: str) -> List[Dict[str, Any]]:
+    """原 MCPClient._parse_tool_calls 的逻辑，作为对比基线"""
+    if not content:
+        return []
+    json_str = content[7:-3].strip() if content.startswith("```json") and content.endswith("```") else content
+    try:
+        data = json.loads(json_str)
+        if isinstance(data, dict):
+            calls = data.get("tool_calls", [])
+            return [calls] if isinstance(calls, dict) else calls
+    except json.JSONDecodeError:
+        pass
+    return []
+
+
+def load_replies(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _tool_names() -> List[str]:
+    with open(os.path.join(REPO_ROOT, "tools.json"), encoding="utf-8") as f:
+        return [tool["name"] for tool in json.load(f).get("tools", [])]
+
+
+def run_parse_benchmark(replies: List[Dict[str, Any]], rounds: int, echo=print) -> Dict[str, Any]:
+    tool_names = set(_tool_names())
+    parsers: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {
+        "legacy": legacy_parse,
+        "extract": lambda reply: extract_tool_calls(reply, tool_names),
+    }
+    texts = [item["reply"] for item in replies]
+    results: Dict[str, Any] = {"replies": len(replies)}
+    for name, parse in parsers.items():
+        failures = []
+        for item in replies:
+            try:
+                calls = parse(item["reply"])
+            except Exception as e:
+                calls = f"异常: {str(e)}"
+            if calls != item["expected"]:
+                failures.append(item["id"])
+
+        per_reply = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for text in texts:
+                parse(text)
+            per_reply.append((time.perf_counter() - started) / len(texts) * 1e6)
+        per_reply.sort()
+        results[name] = {
+            "correct": len(replies) - len(failures),
+            "failures": failures,
+            "p50_us": round(percentile(per_reply, 50), 3),
+            "min_us": round(per_reply[0], 3),
+        }
+        echo(f"{name:<8} 正确 {len(replies) - len(failures)}/{len(replies)}  "
+             f"每条 p50={results[name]['p50_us']:.2f}us min={results[name]['min_us']:.2f}us")
+        if failures:
+            echo(f"         解析结果与预期不一致: {', '.join(failures)}")
+    return results
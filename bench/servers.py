@@ -0,0 +1,262 @@
+"""
+服务端负载生成与基准测试
+依次启动各个服务端入口脚本，按配置的并发度、tools/list 与 tools/call 混合比例、
+负载大小发送请求，统计吞吐量、p50/p95/p99 延迟以及服务端进程内存（RSS）。
+全程离线运行，不涉及任何LLM。
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from bench.common import REPO_ROOT, latency_summary, read_rss_kb
+from framing import READ_CHUNK_BYTES, FrameDecoder, aiter_frames, encode_message
+
+# 服务端入口描述
+#   protocol: simple  -> mcp_server.py 的 {"type": ...} 协议
+#             jsonrpc -> JSON-RPC 2.0（Cline 风格）
+#   persistent: False 表示进程只处理一条请求就退出（cline_mcp_server.py），每个请求单独启动进程
+SERVERS: Dict[str, Dict[str, Any]] = {
+    "mcp_server": {"script": "mcp_server.py", "protocol": "simple", "persistent": True},
+    "caculator_mcp_server": {"script": "caculator_mcp_server.py", "protocol": "jsonrpc", "persistent": True},
+    "cline_caculator_mcp_server": {"script": "cline_caculator_mcp_server.py", "protocol": "jsonrpc", "persistent": True},
+    "cline_mcp_server": {"script": "cline_mcp_server.py", "protocol": "jsonrpc", "persistent": False},
+}
+
+CALL_TOOLS = ["addition", "subtraction", "multiplication", "division"]
+
+# 服务端过载时返回的"服务端繁忙"错误码
+SERVER_BUSY_CODE = -32001
+
+
+def build_message(protocol: str, op: str, request_id: int, tool: str, payload_bytes: int) -> Dict[str, Any]:
+    """构建一条请求；payload_bytes>0 时在参数中附加填充字段模拟大负载"""
+    arguments: Dict[str, Any] = {"a": request_id % 1000 + 1, "b": 7}
+    if payload_bytes > 0:
+        arguments["padding"] = "x" * payload_bytes
+
+    if protocol == "simple":
+        if op == "list":
+            return {"id": request_id, "type": "list_tools"}
+        return {"id": request_id, "type": "call_tool", "name": tool, "arguments": arguments}
+
+    if op == "list":
+        return {"jsonrpc": "2.0", "id": request_id, "method": "tools/list", "params": {}}
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": arguments},
+    }
+
+
+def is_error_response(protocol: str, response: Optional[Dict[str, Any]]) -> bool:
+    if response is None:
+        return True
+    if protocol == "simple":
+        return response.get("type") == "error"
+    return "error" in response
+
+
+def is_busy_response(protocol: str, response: Optional[Dict[str, Any]]) -> bool:
+    if response is None:
+        return False
+    if protocol == "simple":
+        return response.get("code") == SERVER_BUSY_CODE
+    return (response.get("error") or {}).get("code") == SERVER_BUSY_CODE
+
+
+class StdioServerDriver:
+    """通过stdio驱动一个服务端进程，支持多个请求同时在途（流水线）"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[Any, asyncio.Future] = {}  # 按发送顺序保存在途请求
+        self.reader_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(REPO_ROOT, self.spec["script"]),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,  # 服务端调试日志不参与统计，直接丢弃以免管道写满
+            cwd=REPO_ROOT,
+        )
+        self.reader_task = asyncio.create_task(self._read_responses())
+
+    async def _read_responses(self) -> None:
+        assert self.process and self.process.stdout
+        stdout = self.process.stdout
+        # 与客户端相同的增量分帧读取，大响应不受行长限制
+        async for body, frame_error in aiter_frames(lambda: stdout.read(READ_CHUNK_BYTES), FrameDecoder()):
+            if frame_error is not None:
+                continue
+            try:
+                response = json.loads(body)
+            except ValueError:
+                continue
+            if not isinstance(response, dict):
+                continue
+            # 只按id匹配，不带id的响应不猜测对应的请求（该请求按超时处理）
+            future = self.pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+        # 进程输出结束，所有在途请求失败
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result(None)
+        self.pending.clear()
+
+    async def request(self, message: Dict[str, Any], timeout: float) -> Tuple[float, Optional[Dict[str, Any]]]:
+        assert self.process and self.process.stdin
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message["id"]] = future
+        data = encode_message(message)
+        started = time.perf_counter()
+        try:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+            response = await asyncio.wait_for(future, timeout=timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.pending.pop(message["id"], None)
+            response = None
+        return time.perf_counter() - started, response
+
+    def memory(self) -> Dict[str, Optional[int]]:
+        if not self.process:
+            return {"rss_kb": None, "peak_rss_kb": None}
+        return read_rss_kb(self.process.pid)
+
+    async def close(self) -> None:
+        if not self.process:
+            return
+        if self.process.stdin and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        if self.reader_task:
+            await self.reader_task
+
+
+async def _oneshot_request(spec: Dict[str, Any], message: Dict[str, Any], timeout: float) -> Tuple[float, Optional[Dict[str, Any]]]:
+    """单请求服务端：每个请求启动一个新进程，延迟包含进程启动时间"""
+    started = time.perf_counter()
+    driver = StdioServerDriver(spec)
+    await driver.start()
+    _, response = await driver.request(message, timeout)
+    await driver.close()
+    return time.perf_counter() - started, response
+
+
+async def run_scenario(
+    name: str,
+    requests_total: int,
+    concurrency: int,
+    list_ratio: float,
+    payload_bytes: int,
+    warmup: int,
+    seed: int,
+    timeout: float,
+) -> Dict[str, Any]:
+    """对一个服务端运行一个场景（固定负载大小），返回统计结果"""
+    spec = SERVERS[name]
+    protocol = spec["protocol"]
+    rng = random.Random(seed)
+    # 预先生成操作序列，保证同一seed下不同提交之间的请求组合完全一致
+    plan: List[Tuple[str, str]] = [
+        ("list" if rng.random() < list_ratio else "call", rng.choice(CALL_TOOLS))
+        for _ in range(requests_total)
+    ]
+
+    driver: Optional[StdioServerDriver] = None
+    if spec["persistent"]:
+        driver = StdioServerDriver(spec)
+        await driver.start()
+        if protocol == "jsonrpc":
+            await driver.request({"jsonrpc": "2.0", "id": "init", "method": "initialize", "params": {}}, timeout)
+        for i in range(warmup):
+            op, tool = plan[i % len(plan)] if plan else ("list", CALL_TOOLS[0])
+            await driver.request(build_message(protocol, op, -(i + 1), tool, payload_bytes), timeout)
+
+    latencies: Dict[str, List[float]] = {"list": [], "call": []}
+    errors = 0
+    busy = 0
+    cursor = 0
+
+    async def worker() -> None:
+        nonlocal cursor, errors, busy
+        while cursor < len(plan):
+            index = cursor
+            cursor += 1
+            op, tool = plan[index]
+            message = build_message(protocol, op, index, tool, payload_bytes)
+            if driver is not None:
+                elapsed, response = await driver.request(message, timeout)
+            else:
+                elapsed, response = await _oneshot_request(spec, message, timeout)
+            latencies[op].append(elapsed)
+            if is_error_response(protocol, response):
+                errors += 1
+            if is_busy_response(protocol, response):
+                busy += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall = time.perf_counter() - started
+
+    memory: Dict[str, Optional[int]] = {"rss_kb": None, "peak_rss_kb": None}
+    if driver is not None:
+        memory = driver.memory()
+        await driver.close()
+
+    all_latencies = latencies["list"] + latencies["call"]
+    return {
+        "requests": len(all_latencies),
+        "errors": errors,
+        "busy_rejections": busy,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(all_latencies) / wall, 2) if wall > 0 else 0.0,
+        "overall": latency_summary(all_latencies),
+        "tools/list": latency_summary(latencies["list"]),
+        "tools/call": latency_summary(latencies["call"]),
+        "spawn_per_request": not spec["persistent"],
+        **memory,
+    }
+
+
+async def run_benchmark(
+    servers: List[str],
+    requests_total: int,
+    concurrency: int,
+    list_ratio: float,
+    payload_sizes: List[int],
+    warmup: int,
+    seed: int,
+    timeout: float,
+    echo=print,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name in servers:
+        results[name] = {}
+        for payload_bytes in payload_sizes:
+            scenario = f"payload_{payload_bytes}"
+            stats = await run_scenario(
+                name, requests_total, concurrency, list_ratio, payload_bytes, warmup, seed, timeout
+            )
+            results[name][scenario] = stats
+            overall = stats["overall"]
+            echo(
+                f"{name:<28} {scenario:<16} {stats['throughput_rps']:>10.1f} req/s  "
+                f"p50={overall.get('p50_ms', 0):.2f}ms p95={overall.get('p95_ms', 0):.2f}ms "
+                f"p99={overall.get('p99_ms', 0):.2f}ms errors={stats['errors']} busy={stats['busy_rejections']} rss={stats['rss_kb']}KB"
+            )
+    return results
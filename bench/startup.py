@@ -0,0 +1,105 @@
+"""
+服务端冷启动基准测试
+MCPClient 和 MCP 宿主按需启动服务端脚本，解释器启动和模块导入时间决定了首个响应的延迟。
+对每个服务端反复执行"启动进程 -> 发送一条工具列表请求 -> 收到响应"，统计冷启动耗时；
+再以 python -X importtime 启动一次，汇总导入总耗时和耗时最多的顶层模块。
+同时测量空解释器（python -c pass）的启动时间作为基线。
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+from bench.common import REPO_ROOT, latency_summary
+from bench.servers import SERVERS, build_message
+from framing import encode_message
+
+# mcp_server.py 快速启动模式的冷启动目标（毫秒，不含空解释器启动时间），见 README
+COLD_START_TARGET_MS = 80.0
+
+
+def _spawn(args: List[str], stderr=subprocess.DEVNULL) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        cwd=REPO_ROOT,
+    )
+
+
+def measure_cold_start(spec: Dict[str, Any], python_args: List[str] = ()) -> Tuple[float, bytes]:
+    """启动服务端并等待首个响应，返回 (耗时秒, 进程stderr输出)"""
+    message = build_message(spec["protocol"], "list", 1, "addition", 0)
+    capture = subprocess.PIPE if python_args else subprocess.DEVNULL
+    started = time.perf_counter()
+    process = _spawn([*python_args, os.path.join(REPO_ROOT, spec["script"])], stderr=capture)
+    process.stdin.write(encode_message(message))
+    process.stdin.flush()
+    process.stdout.readline()
+    elapsed = time.perf_counter() - started
+    _, stderr = process.communicate(timeout=30)
+    return elapsed, stderr or b""
+
+
+def measure_interpreter() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - started
+
+
+def parse_importtime(stderr: bytes, top: int = 10) -> Dict[str, Any]:
+    """
+    解析 -X importtime 输出（"import time: self [us] | cumulative | imported package"），
+    返回导入总耗时和累计耗时最多的顶层模块（缩进表示被其他模块间接导入）
+    """
+    total_us = 0
+    top_level: List[Tuple[int, str]] = []
+    for line in stderr.decode("utf-8", errors="replace").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头
+        self_us, cumulative_us = int(fields[0]), int(fields[1])
+        total_us += self_us
+        name = fields[2].rstrip()
+        if not name.startswith("  "):
+            top_level.append((cumulative_us, name.strip()))
+    top_level.sort(reverse=True)
+    return {
+        "import_total_ms": round(total_us / 1000, 3),
+        "top_imports": [{"module": name, "cumulative_ms": round(us / 1000, 3)} for us, name in top_level[:top]],
+    }
+
+
+def run_startup_benchmark(servers: List[str], runs: int, warmup: int, echo=print) -> Dict[str, Any]:
+    # 预热文件系统缓存和 .pyc，避免第一次运行拉高统计
+    for _ in range(warmup):
+        measure_interpreter()
+        for name in servers:
+            measure_cold_start(SERVERS[name])
+
+    interpreter = latency_summary([measure_interpreter() for _ in range(runs)])
+    results: Dict[str, Any] = {"interpreter": interpreter}
+    echo(f"{'interpreter':<28} p50={interpreter['p50_ms']:.1f}ms")
+    for name in servers:
+        spec = SERVERS[name]
+        cold_start = latency_summary([measure_cold_start(spec)[0] for _ in range(runs)])
+        _, stderr = measure_cold_start(spec, ["-X", "importtime"])
+        imports = parse_importtime(stderr)
+        # 扣除空解释器启动时间，得到服务端自身（导入+初始化+首个请求）的耗时
+        over_interpreter = round(cold_start["p50_ms"] - interpreter["p50_ms"], 3)
+        results[name] = {
+            "cold_start": cold_start,
+            "over_interpreter_p50_ms": over_interpreter,
+            **imports,
+        }
+        heaviest = ", ".join(f"{item['module']}={item['cumulative_ms']:.1f}ms" for item in imports["top_imports"][:4])
+        echo(
+            f"{name:<28} p50={cold_start['p50_ms']:.1f}ms p95={cold_start['p95_ms']:.1f}ms "
+            f"(+{over_interpreter:.1f}ms) imports={imports['import_total_ms']:.1f}ms [{heaviest}]"
+        )
+    return results
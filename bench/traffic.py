@@ -0,0 +1,303 @@
+"""
+stdio 流量录制与回放
+  - record: 透明代理。启动真实服务端，原样转发两个方向的字节（不重新编码），同时把每条消息
+            连同时间戳写入紧凑的JSONL日志。可以包在任何stdio服务端外面，由 MCPClient 或 Cline 启动
+  - replay: 读取日志，按原始时间间隔（或按倍速加速）把客户端消息发给服务端，
+            按请求id匹配响应，对比录制时和回放时的延迟
+日志格式（每行一个紧凑JSON）：
+  {"command": [...], "started": 1760000000.0}                 # 第一行：被代理的服务端命令和开始时间
+  {"t": 0.001234, "d": "c", "m": {...}}                       # d: c 为客户端->服务端，s 为服务端->客户端
+  {"t": 0.002345, "d": "s", "m": {...}, "f": "content-length"}  # f: 非默认的帧格式
+  无法解析为JSON的消息体记为 "raw"
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional, TextIO, Tuple
+
+from bench.common import latency_summary
+from framing import LINE, READ_CHUNK_BYTES, FrameDecoder, encode_message
+
+CLIENT = "c"
+SERVER = "s"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class TrafficLog:
+    """追加写入流量日志，时间戳为相对录制开始的秒数"""
+
+    def __init__(self, path: str, command: List[str]):
+        self.file: TextIO = open(path, "w", encoding="utf-8")
+        self.started = time.perf_counter()
+        self.file.write(_dumps({"command": command, "started": round(time.time(), 6)}) + "\n")
+
+    def write(self, direction: str, body: bytes, framing: str) -> None:
+        record: Dict[str, Any] = {"t": round(time.perf_counter() - self.started, 6), "d": direction}
+        try:
+            record["m"] = json.loads(body)
+        except ValueError:
+            record["raw"] = body.decode("utf-8", errors="replace")
+        if framing != LINE:
+            record["f"] = framing
+        self.file.write(_dumps(record) + "\n")
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def _pump(read_chunk, write, direction: str, log: TrafficLog) -> None:
+    """
+    原样转发一个方向的字节，同时增量分帧并记录每条完整消息。
+    先记录并刷新日志再转发：对端收到的每条消息都已写入日志，代理被 SIGTERM 等信号直接结束时不会丢失最后一次交互
+    """
+    decoder = FrameDecoder()
+    while True:
+        data = await read_chunk()
+        if not data:
+            return
+        decoder.feed(data)
+        while True:
+            try:
+                body = decoder.next_frame()
+            except ValueError:
+                continue  # 无效或超限的消息照常转发，只是不记录
+            if body is None:
+                break
+            log.write(direction, body, decoder.framing)
+        log.flush()
+        await write(data)
+
+
+def _read_stdin(loop: asyncio.AbstractEventLoop, chunks: asyncio.Queue) -> None:
+    """
+    在守护线程中读取stdin：服务端先退出时不必等待阻塞中的读取，进程可以直接结束。
+    直接读文件描述符，守护线程不持有 sys.stdin 缓冲区的锁，解释器退出时不会因此中止
+    """
+    fd = sys.stdin.fileno()
+    while True:
+        data = os.read(fd, READ_CHUNK_BYTES)
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, data)
+        except RuntimeError:  # 事件循环已关闭
+            return
+        if not data:
+            return
+
+
+async def record_proxy(command: List[str], log_path: str) -> int:
+    """启动服务端并代理stdio，返回服务端退出码。服务端的stderr直接继承，不经过代理"""
+    log = TrafficLog(log_path, command)
+    process = await asyncio.create_subprocess_exec(
+        *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+    )
+    stdout = sys.stdout.buffer
+    chunks: asyncio.Queue = asyncio.Queue()
+    threading.Thread(target=_read_stdin, args=(asyncio.get_running_loop(), chunks), daemon=True).start()
+
+    async def to_server(data: bytes) -> None:
+        process.stdin.write(data)
+        await process.stdin.drain()
+
+    async def to_client(data: bytes) -> None:
+        stdout.write(data)
+        stdout.flush()
+
+    async def client_side() -> None:
+        try:
+            await _pump(chunks.get, to_server, CLIENT, log)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            # 客户端关闭输入后，同样关闭服务端的输入，让其处理完在途请求后退出
+            if not process.stdin.is_closing():
+                process.stdin.close()
+
+    reader = asyncio.create_task(client_side())
+    try:
+        await _pump(lambda: process.stdout.read(READ_CHUNK_BYTES), to_client, SERVER, log)
+        return await process.wait()
+    finally:
+        reader.cancel()
+        log.close()
+
+
+def load_traffic(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """读取流量日志，返回 (头部, 消息列表)；中断时未写完的最后一行会被忽略"""
+    header: Dict[str, Any] = {}
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "d" in record:
+                records.append(record)
+            elif not header:
+                header = record
+    return header, records
+
+
+def _operation(message: Dict[str, Any]) -> str:
+    """统计分组：JSON-RPC 方法或 {"type": ...} 请求类型，工具调用附加工具名"""
+    operation = message.get("method") or message.get("type") or "unknown"
+    params = message.get("params") if isinstance(message.get("params"), dict) else message
+    if operation in ("tools/call", "call_tool") and params.get("name"):
+        operation = f"{operation}:{params['name']}"
+    return operation
+
+
+def _is_error(response: Optional[Dict[str, Any]]) -> bool:
+    return response is None or "error" in response or response.get("type") == "error"
+
+
+def recorded_exchanges(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按id配对录制的请求和响应：[{"t", "message", "framing", "latency"(无响应时为None)}]，通知的latency恒为None"""
+    exchanges: List[Dict[str, Any]] = []
+    waiting: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        message = record.get("m")
+        if not isinstance(message, dict):
+            continue
+        key = _dumps(message.get("id")) if "id" in message else None
+        if record["d"] == CLIENT:
+            exchange = {"t": record["t"], "message": message, "framing": record.get("f", LINE),
+                        "latency": None, "error": None}
+            exchanges.append(exchange)
+            if key is not None and ("method" in message or "type" in message):
+                waiting[key] = exchange
+        elif key is not None and key in waiting:
+            exchange = waiting.pop(key)
+            exchange["latency"] = record["t"] - exchange["t"]
+            exchange["error"] = _is_error(message)
+    return exchanges
+
+
+async def replay_traffic(command: List[str], exchanges: List[Dict[str, Any]], speed: float = 1.0,
+                         timeout: float = 30.0, echo=print) -> Dict[str, Any]:
+    """
+    按录制时的时间间隔除以 speed 发送客户端消息（speed<=0 表示不等待，尽快发送），
+    按id收集响应延迟，与录制时的延迟按操作分组对比
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    loop = asyncio.get_running_loop()
+    pending: Dict[str, Tuple[float, asyncio.Future]] = {}
+
+    async def read_responses() -> None:
+        decoder = FrameDecoder()
+        while True:
+            data = await process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            decoder.feed(data)
+            while True:
+                try:
+                    body = decoder.next_frame()
+                except ValueError:
+                    continue
+                if body is None:
+                    break
+                try:
+                    response = json.loads(body)
+                except ValueError:
+                    continue
+                if not isinstance(response, dict) or "id" not in response:
+                    continue  # 通知（如进度）不参与延迟统计
+                entry = pending.pop(_dumps(response["id"]), None)
+                if entry is not None and not entry[1].done():
+                    entry[1].set_result((time.perf_counter() - entry[0], response))
+        for _, future in pending.values():
+            if not future.done():
+                future.set_result((None, None))
+
+    reader = asyncio.create_task(read_responses())
+    replies: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+    started = time.perf_counter()
+    try:
+        for exchange in exchanges:
+            if speed > 0:
+                delay = started + exchange["t"] / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            message = exchange["message"]
+            if exchange["latency"] is not None:
+                future = loop.create_future()
+                pending[_dumps(message["id"])] = (time.perf_counter(), future)
+                replies.append((exchange, future))
+            process.stdin.write(encode_message(message, exchange["framing"]))
+            await process.stdin.drain()
+
+        outcomes = []
+        for exchange, future in replies:
+            try:
+                latency, response = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                latency, response = None, None
+            outcomes.append((exchange, latency, response))
+        elapsed = time.perf_counter() - started
+    finally:
+        if not process.stdin.is_closing():
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        await reader
+
+    groups: Dict[str, Dict[str, List]] = {}
+    missing = 0
+    changed = 0  # 录制时成功、回放时失败（或相反）的请求数
+    for exchange, latency, response in outcomes:
+        group = groups.setdefault(_operation(exchange["message"]), {"recorded": [], "replayed": []})
+        group["recorded"].append(exchange["latency"])
+        if latency is None:
+            missing += 1
+            continue
+        group["replayed"].append(latency)
+        if _is_error(response) != exchange["error"]:
+            changed += 1
+
+    results: Dict[str, Any] = {
+        "requests": len(replies),
+        "messages": len(exchanges),
+        "missing_responses": missing,
+        "status_changed": changed,
+        "wall_time_ms": round(elapsed * 1000, 3),
+        "operations": {},
+    }
+    for operation, group in sorted(groups.items()):
+        recorded = latency_summary(group["recorded"])
+        replayed = latency_summary(group["replayed"])
+        delta = round(replayed.get("p50_ms", 0.0) - recorded["p50_ms"], 3) if replayed["count"] else None
+        results["operations"][operation] = {"recorded": recorded, "replayed": replayed, "p50_delta": delta}
+        if replayed["count"]:
+            echo(
+                f"{operation:<32} n={recorded['count']:<5} 录制 p50={recorded['p50_ms']:.3f}ms p95={recorded['p95_ms']:.3f}ms  "
+                f"回放 p50={replayed['p50_ms']:.3f}ms p95={replayed['p95_ms']:.3f}ms  ({delta:+.3f}ms)"
+            )
+        else:
+            echo(f"{operation:<32} n={recorded['count']:<5} 回放时无响应")
+    if missing or changed:
+        echo(f"⚠️ {missing} 个请求回放时无响应，{changed} 个请求的成功/失败状态与录制时不同")
+    return results
+
+
+def resolve_command(command: List[str]) -> List[str]:
+    """以 .py 结尾的单个参数视为服务端脚本，用当前解释器启动"""
+    if len(command) == 1 and command[0].endswith(".py"):
+        return [sys.executable, os.path.abspath(command[0])]
+    return list(command)
@@ -2,35 +2,22 @@
 """
 Cline MCP 计算器服务器
 支持 JSON-RPC 2.0 协议
-实现四则运算工具：addition, subtraction, multiplication, division
+实现四则运算工具：addition, subtraction, multiplication, division，以及表达式求值工具 evaluate
 """
 
 import sys
 import json
+import queue
+import threading
 
-# ---------- 工具函数 ----------
-
-def addition(args):
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a + b
-
-def subtraction(args):
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a - b
+from framing import READ_CHUNK_BYTES, FrameDecoder, FrameError, encode_message, iter_frames, message_id
+from calculator_tools import (
+    ARITHMETIC_INPUT_SCHEMA, ARITHMETIC_OUTPUT_SCHEMA, EVALUATE_TOOL,
+    addition, subtraction, multiplication, division, evaluate, tool_result
+)
 
-def multiplication(args):
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a * b
-
-def division(args):
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    if b == 0:
-        raise ValueError("除数不能为0")
-    return a / b
+# ---------- 工具函数 ----------
+# 四则运算与表达式求值的实现见 calculator_tools
 
 
 # ---------- JSON-RPC 请求处理 ----------
@@ -40,6 +27,10 @@ def handle_jsonrpc_request(request):
     params = request.get("params", {})
     request_id = request.get("id")
 
+    # 通知（如 notifications/initialized）不需要响应
+    if isinstance(method, str) and method.startswith("notifications/"):
+        return None
+
     if method == "initialize":
         # ⚠ 修复：capabilities.tools 必须是对象
         return {
@@ -57,6 +48,14 @@ def handle_jsonrpc_request(request):
             }
         }
 
+    elif method == "ping":
+        # 心跳：回复空结果
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {}
+        }
+
     elif method == "tools/list":
         return {
             "jsonrpc": "2.0",
@@ -66,51 +65,28 @@ def handle_jsonrpc_request(request):
                     {
                         "name": "addition",
                         "description": "计算两个数字的和",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "a": {"type": "number"},
-                                "b": {"type": "number"}
-                            },
-                            "required": ["a", "b"]
-                        }
+                        "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                        "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                     },
                     {
                         "name": "subtraction",
                         "description": "计算两个数字的差",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "a": {"type": "number"},
-                                "b": {"type": "number"}
-                            },
-                            "required": ["a", "b"]
-                        }
+                        "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                        "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                     },
                     {
                         "name": "multiplication",
                         "description": "计算两个数字的积",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "a": {"type": "number"},
-                                "b": {"type": "number"}
-                            },
-                            "required": ["a", "b"]
-                        }
+                        "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                        "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                     },
                     {
                         "name": "division",
                         "description": "计算两个数字的商（除数不能为0）",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "a": {"type": "number"},
-                                "b": {"type": "number"}
-                            },
-                            "required": ["a", "b"]
-                        }
-                    }
+                        "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                        "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
+                    },
+                    EVALUATE_TOOL
                 ]
             }
         }
@@ -128,20 +104,15 @@ def handle_jsonrpc_request(request):
                 result = multiplication(arguments)
             elif tool_name == "division":
                 result = division(arguments)
+            elif tool_name == "evaluate":
+                result = evaluate(arguments)
             else:
                 raise ValueError(f"未知工具: {tool_name}")
 
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
-                "result": {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": str(result)
-                        }
-                    ]
-                }
+                "result": tool_result(result)
             }
 
         except Exception as e:
@@ -167,25 +138,72 @@ def handle_jsonrpc_request(request):
 
 # ---------- 主循环 ----------
 
+# 心跳消息很小，超过该大小的消息不尝试按心跳解析
+PING_MAX_BYTES = 256
+
+
 def main():
     print("✅ Cline MCP Calculator Server 已启动", file=sys.stderr)
 
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+    # 按块读取并增量分帧，支持大消息；响应沿用请求的帧格式（每行一个JSON 或 Content-Length）
+    decoder = FrameDecoder()
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    write_lock = threading.Lock()
+    messages: queue.SimpleQueue = queue.SimpleQueue()
+
+    def send(response):
+        with write_lock:
+            stdout.write(encode_message(response, decoder.framing))
+            stdout.flush()
+
+    def read_input():
+        """
+        读取线程：请求在主线程中逐个处理，读取线程持续读取输入并直接应答心跳 ping，
+        耗时较长的工具调用期间心跳仍能得到应答（ping 无应答说明服务端已停止读取输入，而不是正在处理请求）
+        """
+        for body, frame_error in iter_frames(lambda: stdin.read1(READ_CHUNK_BYTES), decoder):
+            if body is not None and len(body) <= PING_MAX_BYTES and b'"ping"' in body:
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    request = None
+                if isinstance(request, dict) and request.get("method") == "ping":
+                    send(handle_jsonrpc_request(request))
+                    continue
+            messages.put((body, frame_error))
+        messages.put(None)
+
+    threading.Thread(target=read_input, name="stdin-reader", daemon=True).start()
+    while True:
+        message = messages.get()
+        if message is None:
+            break
+        body, frame_error = message
         try:
-            request = json.loads(line)
+            if frame_error is not None:
+                raise frame_error
+            request = json.loads(body)
             response = handle_jsonrpc_request(request)
         except json.JSONDecodeError as e:
+            # 无法解析的消息：能从消息开头恢复请求id时回显id
             response = {
                 "jsonrpc": "2.0",
-                "id": None,
+                "id": message_id(body),
                 "error": {
                     "code": -32700,
                     "message": f"JSON解析错误: {str(e)}"
                 }
             }
+        except ValueError as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": message_id(e.prefix) if isinstance(e, FrameError) else None,
+                "error": {
+                    "code": -32600,
+                    "message": f"无效的消息: {str(e)}"
+                }
+            }
         except Exception as e:
             response = {
                 "jsonrpc": "2.0",
@@ -196,9 +214,9 @@ def main():
                 }
             }
 
-        # 输出到 stdout，供 Cline 读取
-        sys.stdout.write(json.dumps(response) + "\n")
-        sys.stdout.flush()
+        # 输出到 stdout，供 Cline 读取（通知没有响应）
+        if response is not None:
+            send(response)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,483 @@
+"""
+计算器公共工具（各服务端共用）
+  addition/subtraction/multiplication/division:
+            四则运算，可选数值模式 mode: float（默认）、decimal（配合 precision 有效位数）、
+            fraction（精确分数）、integer（任意精度整数）；整数输入走原生整数快速路径
+            （decimal 模式下结果仍按 precision 舍入）
+  evaluate: 基于AST的安全表达式求值（不使用eval），一次调用计算完整表达式，
+            支持运算优先级、括号、正负号、乘方和变量，编译结果按表达式缓存，可批量计算
+  statistics: 数值数组的汇总统计（count/sum/mean/min/max），数组可以是JSON列表，
+            也可以是共享内存数组句柄（见 shared_arrays，服务端传入的是不复制的视图）
+  tool_result: 把工具返回值封装为 structuredContent（带类型的JSON）+ 紧凑文本块（实现见 typed_results，
+            在此重新导出），各工具的 outputSchema 描述 structuredContent 的结构
+"""
+
+import ast
+import decimal
+import functools
+import math
+import operator
+from fractions import Fraction
+from typing import Dict, Any, Callable, List, Union
+
+from typed_results import MAX_INTEGER_DIGITS, parse_int, tool_result
+
+Number = Union[int, float]
+Exact = Union[int, float, decimal.Decimal, Fraction]
+
+# ---------- 四则运算 ----------
+
+NUMERIC_MODES = ("float", "decimal", "fraction", "integer")
+DEFAULT_DECIMAL_PRECISION = 28
+MAX_DECIMAL_PRECISION = 1000
+# 整数结果的二进制位数上限：不超过该位数的整数都能按 MAX_INTEGER_DIGITS 位十进制数返回
+MAX_INT_BITS = int((MAX_INTEGER_DIGITS - 1) / math.log10(2))
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _convert(converter: Callable[[Any], Any], value: Any) -> Any:
+    """转换输入数值，失败时统一报告为无效参数"""
+    try:
+        return converter(value)
+    except (TypeError, ValueError, ArithmeticError) as e:
+        raise ValueError(f"无效的输入参数: {str(e) or type(e).__name__}")
+
+
+def _to_decimal(value: Any) -> decimal.Decimal:
+    # 浮点数经 str 转换保留其最短十进制表示（0.1 -> Decimal("0.1")），避免二进制误差被带入
+    return decimal.Decimal(value if _is_int(value) else str(value).strip())
+
+
+def _to_fraction(value: Any) -> Fraction:
+    return Fraction(value) if _is_int(value) else Fraction(str(value).strip())
+
+
+def _to_integer(value: Any) -> int:
+    if _is_int(value):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return parse_int(value)
+    raise ValueError(f"integer 模式要求整数输入: {value}")
+
+
+def _checked(value: Any) -> Any:
+    """整数（或分数的分子分母）超过 MAX_INT_BITS 时报错，不把无法返回的结果交给序列化"""
+    if _is_int(value):
+        if value.bit_length() > MAX_INT_BITS:
+            raise ValueError(f"计算结果过大（上限 {MAX_INTEGER_DIGITS} 位整数）")
+    elif isinstance(value, Fraction):
+        _checked(value.numerator)
+        _checked(value.denominator)
+    return value
+
+
+def _apply(op: str, a: Any, b: Any) -> Any:
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if b == 0:
+        raise ValueError("除数不能为0")
+    return a / b
+
+
+def arithmetic(op: str, args: Dict[str, Any]) -> Exact:
+    """
+    按数值模式执行一次二元运算
+      mode 缺省时：给出 precision 则为 decimal，否则为 float（与原有行为一致）
+      快速路径：非 float 模式下两个输入均为整数时直接使用原生整数运算（除法整除时同样如此），
+      decimal 模式下其结果同样按 precision 有效位数舍入，precision 对所有输入一致生效
+    """
+    precision = args.get("precision")
+    mode = args.get("mode") or ("decimal" if precision is not None else "float")
+    if mode not in NUMERIC_MODES:
+        raise ValueError(f"不支持的数值模式: {mode}（可选: {', '.join(NUMERIC_MODES)}）")
+    a, b = args.get("a"), args.get("b")
+
+    if mode == "float":
+        a, b = _convert(float, a), _convert(float, b)
+        result = _apply(op, a, b)
+        if math.isinf(result) and not (math.isinf(a) or math.isinf(b)):
+            raise ValueError("计算结果超出浮点数范围，请使用 mode=integer/decimal/fraction 精确计算")
+        return result
+
+    digits = None
+    if mode == "decimal":
+        digits = DEFAULT_DECIMAL_PRECISION if precision is None else _convert(int, precision)
+        if not 1 <= digits <= MAX_DECIMAL_PRECISION:
+            raise ValueError(f"precision 必须在 1~{MAX_DECIMAL_PRECISION} 之间")
+
+    if _is_int(a) and _is_int(b) and (op != "/" or (b != 0 and a % b == 0)):
+        result = _checked(a // b if op == "/" else _apply(op, a, b))
+        if digits is None:
+            return result
+        with decimal.localcontext() as context:
+            context.prec = digits
+            return +decimal.Decimal(result)
+
+    if mode == "decimal":
+        a, b = _convert(_to_decimal, a), _convert(_to_decimal, b)
+        with decimal.localcontext() as context:
+            context.prec = digits
+            # 在上下文内完成运算，保证结果按指定有效位数舍入
+            return +_apply(op, a, b)
+
+    if mode == "fraction":
+        return _apply(op, _convert(_to_fraction, a), _convert(_to_fraction, b))
+
+    # integer：任意精度整数，除法不能整除时返回精确分数
+    a, b = _convert(_to_integer, a), _convert(_to_integer, b)
+    if op == "/":
+        if b == 0:
+            raise ValueError("除数不能为0")
+        return a // b if a % b == 0 else Fraction(a, b)
+    return _checked(_apply(op, a, b))
+
+
+def addition(args: Dict[str, Any]) -> Exact:
+    return arithmetic("+", args)
+
+def subtraction(args: Dict[str, Any]) -> Exact:
+    return arithmetic("-", args)
+
+def multiplication(args: Dict[str, Any]) -> Exact:
+    return arithmetic("*", args)
+
+def division(args: Dict[str, Any]) -> Exact:
+    return arithmetic("/", args)
+
+
+ARITHMETIC_PARAMETERS: Dict[str, Any] = {
+    "properties": {
+        "a": {"type": ["number", "string"], "description": "第一个数字，精确模式下可用字符串传入大整数或小数"},
+        "b": {"type": ["number", "string"], "description": "第二个数字"},
+        "mode": {"type": "string", "enum": list(NUMERIC_MODES),
+                 "description": "数值模式：float（默认）、decimal、fraction（精确分数）、integer（任意精度整数）"},
+        "precision": {"type": "integer", "minimum": 1, "maximum": MAX_DECIMAL_PRECISION,
+                      "description": "decimal 模式的有效位数，给出时默认使用 decimal 模式"},
+    },
+    "required": ["a", "b"],
+}
+
+ARITHMETIC_INPUT_SCHEMA: Dict[str, Any] = {"type": "object", **ARITHMETIC_PARAMETERS}
+
+# typed_value 产出的带类型数值
+TYPED_NUMBER_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string", "enum": ["integer", "float", "decimal", "fraction"]},
+        "value": {"type": ["number", "string"], "description": "超出安全整数范围的整数、decimal 和 fraction 以字符串表示"},
+        "numerator": {"type": ["integer", "string"]},
+        "denominator": {"type": ["integer", "string"]},
+        "approx": {"type": ["number", "null"], "description": "fraction 的浮点近似值"},
+    },
+    "required": ["type", "value"],
+}
+
+ARITHMETIC_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"result": TYPED_NUMBER_SCHEMA},
+    "required": ["result"],
+}
+
+# ---------- 表达式求值 ----------
+
+# 表达式长度与指数上限，防止恶意输入耗尽CPU/内存（整数结果的位数上限见 MAX_INT_BITS）
+MAX_EXPRESSION_LENGTH = 10000
+MAX_EXPONENT = 10000
+
+# 全角符号/数学符号替换为ASCII运算符；计算器习惯写法 2^10 表示乘方，按 ** 的优先级解析
+_NORMALIZE = str.maketrans({"×": "*", "÷": "/", "（": "(", "）": ")", "－": "-", "＋": "+", "−": "-", "^": "**"})
+
+
+def _power(base: Number, exponent: Number) -> Number:
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"指数过大（上限 {MAX_EXPONENT}）")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        if base.bit_length() * exponent > MAX_INT_BITS:
+            raise ValueError("乘方结果过大")
+    if base == 0 and exponent < 0:
+        raise ValueError("除数不能为0")
+    return base ** exponent
+
+
+def _multiply(a: Number, b: Number) -> Number:
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > MAX_INT_BITS + 1:
+        raise ValueError("乘积过大")
+    return a * b
+
+
+def _divide(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise ValueError("除数不能为0")
+    return a / b
+
+
+def _floor_divide(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise ValueError("除数不能为0")
+    return a // b
+
+
+def _modulo(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise ValueError("除数不能为0")
+    return a % b
+
+
+_BINARY_OPS: Dict[type, Callable[[Number, Number], Number]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _multiply,
+    ast.Div: _divide,
+    ast.FloorDiv: _floor_divide,
+    ast.Mod: _modulo,
+    ast.Pow: _power,
+}
+
+_UNARY_OPS: Dict[type, Callable[[Number], Number]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_FUNCTIONS: Dict[str, Callable[..., Number]] = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+}
+
+Compiled = Callable[[Dict[str, Number]], Number]
+
+
+def _compile_node(node: ast.AST) -> Compiled:
+    """把AST节点编译成闭包，只允许数字、变量、四则运算、乘方和白名单函数"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"不支持的常量: {value!r}")
+        return lambda variables: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def lookup(variables: Dict[str, Number]) -> Number:
+            if name not in variables:
+                raise ValueError(f"未定义的变量: {name}")
+            return variables[name]
+        return lookup
+
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"不支持的运算符: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda variables: op(left(variables), right(variables))
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"不支持的运算符: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda variables: op(operand(variables))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise ValueError(f"不支持的函数调用: {ast.dump(node.func)}")
+        function = _FUNCTIONS[node.func.id]
+        arguments = [_compile_node(arg) for arg in node.args]
+        return lambda variables: function(*(arg(variables) for arg in arguments))
+
+    raise ValueError(f"不支持的表达式成分: {type(node).__name__}")
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> Compiled:
+    """解析并编译表达式，结果按表达式文本缓存"""
+    if not isinstance(expression, str) or not expression.strip():
+        raise ValueError("表达式不能为空")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"表达式过长（上限 {MAX_EXPRESSION_LENGTH} 个字符）")
+    try:
+        tree = ast.parse(expression.translate(_NORMALIZE).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {e.msg}")
+    return _compile_node(tree)
+
+
+def evaluate_expression(expression: str, variables: Dict[str, Number] = None) -> Number:
+    try:
+        return _checked(compile_expression(expression)(variables or {}))
+    except ZeroDivisionError:
+        raise ValueError("除数不能为0")
+    except OverflowError:
+        raise ValueError("计算结果溢出")
+
+
+def evaluate(args: Dict[str, Any]) -> Union[Number, List[Dict[str, Any]]]:
+    """
+    工具入口：
+      {"expression": "(3+4)*5/2 - 7", "variables": {"x": 1}} -> 数值
+      {"expressions": ["1+2", "3*4"]}                        -> [{"expression", "result"|"error"}, ...]
+    批量模式下单个表达式出错不影响其他表达式
+    """
+    variables = args.get("variables") or {}
+    if not isinstance(variables, dict):
+        raise ValueError("variables 必须是对象")
+    try:
+        variables = {str(k): float(v) if not isinstance(v, int) else v for k, v in variables.items()}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"无效的变量值: {str(e)}")
+
+    expressions = args.get("expressions")
+    if expressions is not None:
+        if not isinstance(expressions, list):
+            raise ValueError("expressions 必须是字符串列表")
+        results = []
+        for expression in expressions:
+            try:
+                results.append({"expression": expression, "result": evaluate_expression(expression, variables)})
+            except (ValueError, TypeError) as e:
+                results.append({"expression": expression, "error": str(e)})
+        return results
+
+    expression = args.get("expression")
+    if expression is None:
+        raise ValueError("缺少参数 expression 或 expressions")
+    return evaluate_expression(expression, variables)
+
+
+EVALUATE_DESCRIPTION = (
+    "一次性计算完整的算术表达式，支持 + - * / // % 、乘方（** 或 ^）、括号、负号和 abs/round/min/max/sqrt，"
+    "如 \"(3+4)*5/2 - 7\"；遇到多步运算时请优先使用此函数，也可通过 expressions 批量计算多个表达式"
+)
+
+# mcp_server.add_tool 使用的参数定义（properties + required）
+EVALUATE_PARAMETERS: Dict[str, Any] = {
+    "properties": {
+        "expression": {"type": "string", "description": "要计算的表达式"},
+        "expressions": {"type": "array", "items": {"type": "string"}, "description": "批量计算的表达式列表"},
+        "variables": {"type": "object", "additionalProperties": {"type": "number"}, "description": "表达式中使用的变量"},
+    },
+    "required": [],
+}
+
+# 单个表达式返回带类型数值，expressions 批量计算返回逐条结果
+EVALUATE_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "result": {
+            "oneOf": [
+                TYPED_NUMBER_SCHEMA,
+                {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "expression": {"type": "string"},
+                            "result": TYPED_NUMBER_SCHEMA,
+                            "error": {"type": "string"},
+                        },
+                        "required": ["expression"],
+                    },
+                },
+            ]
+        }
+    },
+    "required": ["result"],
+}
+
+# JSON-RPC 服务端 tools/list 使用的完整定义
+EVALUATE_TOOL: Dict[str, Any] = {
+    "name": "evaluate",
+    "description": EVALUATE_DESCRIPTION,
+    "inputSchema": {"type": "object", **EVALUATE_PARAMETERS},
+    "outputSchema": EVALUATE_OUTPUT_SCHEMA,
+}
+
+
+# ---------- 数组统计 ----------
+
+def statistics(args: Dict[str, Any]) -> Dict[str, Number]:
+    """
+    values 为数字列表、numpy.ndarray 或 memoryview（共享内存数组在服务端被替换为视图），
+    多维数组按全部元素统计；有 NumPy 时整块计算，否则直接遍历视图，都不复制数据
+    """
+    values = args.get("values")
+    if values is None:
+        raise ValueError("缺少参数 values")
+    if isinstance(values, memoryview):
+        values = values.cast("B").cast(values.format) if values.ndim > 1 else values
+    elif hasattr(values, "ravel"):
+        values = values.ravel()
+    count = len(values)
+    if count == 0:
+        raise ValueError("values 不能为空")
+    if hasattr(values, "sum"):  # numpy.ndarray
+        total = float(values.sum(dtype="float64"))
+        low, high = values.min().item(), values.max().item()
+    else:
+        try:
+            total = math.fsum(values)
+        except TypeError:
+            raise ValueError("values 必须是数字数组")
+        low, high = min(values), max(values)
+    return {"count": count, "sum": total, "mean": total / count, "min": low, "max": high}
+
+
+STATISTICS_DESCRIPTION = (
+    "计算数值数组的个数、总和、平均值、最小值和最大值；大数组可通过共享内存句柄传入"
+)
+
+STATISTICS_PARAMETERS: Dict[str, Any] = {
+    "properties": {
+        "values": {
+            "oneOf": [
+                {"type": "array", "items": {"type": "number"}},
+                {
+                    "type": "object",
+                    "description": "共享内存数组句柄（同机客户端，见 shared_arrays.SharedArrays）",
+                    "properties": {
+                        "type": {"const": "shared_array"},
+                        "name": {"type": "string"},
+                        "dtype": {"type": "string"},
+                        "shape": {"type": "array", "items": {"type": "integer"}},
+                    },
+                    "required": ["type", "name", "shape"],
+                },
+            ],
+            "description": "数字数组",
+        },
+    },
+    "required": ["values"],
+}
+
+STATISTICS_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "result": {
+            "type": "object",
+            "properties": {name: TYPED_NUMBER_SCHEMA for name in ("count", "sum", "mean", "min", "max")},
+            "required": ["count", "sum", "mean", "min", "max"],
+        }
+    },
+    "required": ["result"],
+}
+
+STATISTICS_TOOL: Dict[str, Any] = {
+    "name": "statistics",
+    "description": STATISTICS_DESCRIPTION,
+    "inputSchema": {"type": "object", **STATISTICS_PARAMETERS},
+    "outputSchema": STATISTICS_OUTPUT_SCHEMA,
+}
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Cline MCP 计算器服务器（JSON-RPC 2.0）
-支持四则运算：addition, subtraction, multiplication, division
+支持四则运算：addition, subtraction, multiplication, division，表达式求值工具 evaluate，
+以及数组统计工具 statistics（大数组可通过共享内存句柄传入，见 shared_arrays）
 适合直接在 Cline 中启动
 """
 
@@ -9,47 +10,50 @@ import sys
 import json
 import asyncio
 import traceback
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional, Tuple
 
-# ---------- 工具函数 ----------
-
-def addition(args: Dict[str, Any]) -> float:
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a + b
-
-def subtraction(args: Dict[str, Any]) -> float:
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a - b
+from framing import FrameDecoder, aiter_frames, encode_message, message_id, thread_reader
+from tool_runtime import CancelToken, run_tool
+from calculator_tools import (
+    ARITHMETIC_INPUT_SCHEMA, ARITHMETIC_OUTPUT_SCHEMA, EVALUATE_TOOL, STATISTICS_TOOL,
+    addition, subtraction, multiplication, division, evaluate, statistics, tool_result
+)
+from shared_arrays import attach_arguments, release
 
-def multiplication(args: Dict[str, Any]) -> float:
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    return a * b
+# ---------- 工具函数 ----------
 
-def division(args: Dict[str, Any]) -> float:
-    a = float(args.get("a"))
-    b = float(args.get("b"))
-    if b == 0:
-        raise ValueError("除数不能为0")
-    return a / b
+# 四则运算与表达式求值的实现见 calculator_tools
 
 TOOLS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
     "addition": addition,
     "subtraction": subtraction,
     "multiplication": multiplication,
-    "division": division
+    "division": division,
+    "evaluate": evaluate,
+    "statistics": statistics
+}
+
+# 除四则运算（统一为两个数字参数）外，其他工具的完整定义
+TOOL_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "evaluate": EVALUATE_TOOL,
+    "statistics": STATISTICS_TOOL
 }
 
+# 在途请求：请求id -> (处理任务, 取消令牌)，用于响应 notifications/cancelled
+INFLIGHT: Dict[Any, Tuple[asyncio.Task, CancelToken]] = {}
+
 # ---------- JSON-RPC 处理 ----------
 
-async def handle_request(request: Dict[str, Any], timeout: int = 30) -> Dict[str, Any]:
+async def handle_request(request: Dict[str, Any], timeout: int = 30, token: Optional[CancelToken] = None) -> Optional[Dict[str, Any]]:
     request_id = request.get("id")
     method = request.get("method")
     params = request.get("params", {})
 
     try:
+        # 通知（如 notifications/initialized）不需要响应
+        if isinstance(method, str) and method.startswith("notifications/"):
+            return None
+
         if method == "initialize":
             return {
                 "jsonrpc": "2.0",
@@ -72,14 +76,11 @@ async def handle_request(request: Dict[str, Any], timeout: int = 30) -> Dict[str
                 "id": request_id,
                 "result": {
                     "tools": [
-                        {
+                        TOOL_DEFINITIONS.get(name) or {
                             "name": name,
                             "description": f"计算两个数字的{name}操作",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {"a": {"type": "number"}, "b": {"type": "number"}},
-                                "required": ["a", "b"]
-                            }
+                            "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                            "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                         } for name in TOOLS.keys()
                     ]
                 }
@@ -96,22 +97,23 @@ async def handle_request(request: Dict[str, Any], timeout: int = 30) -> Dict[str
                     "error": {"code": -32601, "message": f"未知工具: {tool_name}"}
                 }
 
-            loop = asyncio.get_event_loop()
+            token = token or CancelToken()
+            segments = []
             try:
+                # 共享内存数组句柄替换为不复制的数组视图
+                args, segments = attach_arguments(args)
+                # 内置工具均为有界计算，在线程中执行；超时/取消时设置令牌通知工具退出
                 result = await asyncio.wait_for(
-                    loop.run_in_executor(None, TOOLS[tool_name], args),
+                    run_tool(TOOLS[tool_name], args, token, isolation="thread"),
                     timeout=timeout
                 )
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
-                    "result": {
-                        "content": [
-                            {"type": "text", "text": str(result)}
-                        ]
-                    }
+                    "result": tool_result(result)
                 }
             except asyncio.TimeoutError:
+                token.cancel("timeout")
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
@@ -123,6 +125,10 @@ async def handle_request(request: Dict[str, Any], timeout: int = 30) -> Dict[str
                     "id": request_id,
                     "error": {"code": -32000, "message": f"工具调用失败: {str(e)}"}
                 }
+            finally:
+                if segments:
+                    args = None  # 先放开视图引用，共享内存才能解除映射
+                    release(segments)
 
         else:
             return {
@@ -140,35 +146,96 @@ async def handle_request(request: Dict[str, Any], timeout: int = 30) -> Dict[str
 
 # ---------- 主循环 ----------
 
+# 响应沿用客户端最近一条消息的帧格式（每行一个JSON 或 Content-Length）
+DECODER = FrameDecoder()
+
+def send_response(response: Dict[str, Any]):
+    sys.stdout.buffer.write(encode_message(response, DECODER.framing))
+    sys.stdout.buffer.flush()
+
+async def process_request(request: Dict[str, Any], timeout: int):
+    request_id = request.get("id")
+    token = CancelToken()
+    if request_id is not None:
+        INFLIGHT[request_id] = (asyncio.current_task(), token)
+    try:
+        response = await handle_request(request, timeout, token)
+    except asyncio.CancelledError:
+        # 已被客户端取消的请求不再发送响应
+        return
+    finally:
+        INFLIGHT.pop(request_id, None)
+    if response is not None:
+        send_response(response)
+
+def cancel_request(params: Dict[str, Any]):
+    entry = INFLIGHT.get(params.get("requestId"))
+    if entry is None:
+        return
+    task, token = entry
+    token.cancel(params.get("reason") or "客户端取消")
+    task.cancel()
+
 async def main(timeout: int = 30):
     print("✅ Cline MCP Calculator Server 已启动", file=sys.stderr)
+    pending = set()
 
-    while True:
+    # 在专用线程中直接读文件描述符：读取线程阻塞时不持有 sys.stdin 缓冲区的锁（fork 出的子进程会关闭 sys.stdin），
+    # 也不占用工具使用的默认线程池，工具调用占满线程池时仍能及时应答心跳和取消通知
+    # 异步按块读取 stdin 并增量分帧，支持大消息
+    async for body, frame_error in aiter_frames(thread_reader(sys.stdin.fileno()), DECODER):
         try:
-            # 异步读取 stdin
-            line = await asyncio.to_thread(sys.stdin.readline)
-            if not line:
-                break
-            line = line.strip()
-            if not line:
+            # 无法解析的消息：能从消息开头恢复请求id时回显id
+            if frame_error is not None:
+                send_response({"jsonrpc": "2.0", "id": message_id(frame_error.prefix),
+                               "error": {"code": -32600, "message": f"无效的消息: {str(frame_error)}"}})
                 continue
 
             try:
-                request = json.loads(line)
-            except json.JSONDecodeError as e:
-                error = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": f"JSON解析错误: {str(e)}"}}
-                print(json.dumps(error))
-                sys.stdout.flush()
+                request = json.loads(body)
+            except ValueError as e:
+                send_response({"jsonrpc": "2.0", "id": message_id(body), "error": {"code": -32700, "message": f"JSON解析错误: {str(e)}"}})
+                continue
+
+            # 合法JSON但不是对象（如数组）时直接返回错误，不创建处理任务
+            if not isinstance(request, dict):
+                send_response({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "无效的请求: 消息必须是JSON对象"}})
+                continue
+
+            if request.get("method") == "notifications/cancelled":
+                cancel_request(request.get("params") or {})
                 continue
 
-            response = await handle_request(request, timeout)
-            print(json.dumps(response))
-            sys.stdout.flush()
+            # 心跳 ping 在读取循环中直接应答，不等待在途的工具调用
+            if request.get("method") == "ping":
+                send_response({"jsonrpc": "2.0", "id": request.get("id"), "result": {}})
+                continue
+
+            # 并发处理请求，长时间运行的工具不阻塞后续请求（包括取消通知）的读取
+            task = asyncio.create_task(process_request(request, timeout))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
 
         except Exception as e:
-            error = {"jsonrpc": "2.0", "id": None, "error": {"code": -32603, "message": f"服务器异常: {str(e)}\n{traceback.format_exc()}"}}
-            print(json.dumps(error))
-            sys.stdout.flush()
+            send_response({"jsonrpc": "2.0", "id": None, "error": {"code": -32603, "message": f"服务器异常: {str(e)}\n{traceback.format_exc()}"}})
+
+    # 输入结束后等待在途请求处理完毕再退出
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def cli():
+    # 延迟导入：只有需要解析命令行参数时才导入 click
+    import click
+
+    @click.command()
+    @click.option("--timeout", default=30, help="工具调用超时时间（秒）")
+    def command(timeout):
+        asyncio.run(main(timeout=timeout))
+
+    command()
 
 if __name__ == "__main__":
-    asyncio.run(main(timeout=30))
+    if len(sys.argv) > 1:
+        cli()
+    else:
+        asyncio.run(main(timeout=30))
@@ -7,43 +7,12 @@
 import json
 import sys
 
-def addition(args):
-    """计算两个数字的和"""
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a + b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
-
-def subtraction(args):
-    """计算两个数字的差"""
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a - b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
-
-def multiplication(args):
-    """计算两个数字的积"""
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a * b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
+from calculator_tools import (
+    ARITHMETIC_INPUT_SCHEMA, ARITHMETIC_OUTPUT_SCHEMA, EVALUATE_TOOL,
+    addition, subtraction, multiplication, division, evaluate, tool_result
+)
 
-def division(args):
-    """计算两个数字的商"""
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        if b == 0:
-            raise ValueError("除数不能为0")
-        return a / b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
+# 四则运算与表达式求值的实现见 calculator_tools
 
 def handle_jsonrpc_request(request):
     """处理JSON-RPC请求"""
@@ -53,6 +22,10 @@ def handle_jsonrpc_request(request):
         request_id = request.get("id")
         
         print(f"处理JSON-RPC方法: {method}", file=sys.stderr)
+
+        # 通知（如 notifications/initialized）不需要响应
+        if isinstance(method, str) and method.startswith("notifications/"):
+            return None
         
         if method == "initialize":
             # 响应initialize请求
@@ -72,6 +45,15 @@ def handle_jsonrpc_request(request):
             }
             return response
         
+        elif method == "ping":
+            # 心跳：回复空结果
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {}
+            }
+            return response
+        
         elif method == "tools/list":
             # 返回工具列表
             response = {
@@ -82,51 +64,28 @@ def handle_jsonrpc_request(request):
                         {
                             "name": "addition",
                             "description": "计算两个数字的和，如果遇到计算两个数字的和的问题，请优先使用此函数",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "a": {"type": "number"},
-                                    "b": {"type": "number"}
-                                },
-                                "required": ["a", "b"]
-                            }
+                            "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                            "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                         },
                         {
                             "name": "subtraction",
                             "description": "计算两个数字的差",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "a": {"type": "number"},
-                                    "b": {"type": "number"}
-                                },
-                                "required": ["a", "b"]
-                            }
+                            "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                            "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                         },
                         {
                             "name": "multiplication",
                             "description": "计算两个数字的积",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "a": {"type": "number"},
-                                    "b": {"type": "number"}
-                                },
-                                "required": ["a", "b"]
-                            }
+                            "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                            "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
                         },
                         {
                             "name": "division",
                             "description": "计算两个数字的商",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "a": {"type": "number"},
-                                    "b": {"type": "number"}
-                                },
-                                "required": ["a", "b"]
-                            }
-                        }
+                            "inputSchema": ARITHMETIC_INPUT_SCHEMA,
+                            "outputSchema": ARITHMETIC_OUTPUT_SCHEMA
+                        },
+                        EVALUATE_TOOL
                     ]
                 }
             }
@@ -148,20 +107,15 @@ def handle_jsonrpc_request(request):
                     result = multiplication(arguments)
                 elif tool_name == "division":
                     result = division(arguments)
+                elif tool_name == "evaluate":
+                    result = evaluate(arguments)
                 else:
                     raise ValueError(f"工具 '{tool_name}' 不存在")
                 
                 response = {
                     "jsonrpc": "2.0",
                     "id": request_id,
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": str(result)
-                            }
-                        ]
-                    }
+                    "result": tool_result(result)
                 }
                 return response
                 
@@ -215,9 +169,11 @@ def main():
                 response = handle_jsonrpc_request(request)
                 print(f"生成响应: {response}", file=sys.stderr)
                 
-                print(json.dumps(response))
-                sys.stdout.flush()
-                print("发送响应完成", file=sys.stderr)
+                # 通知没有响应
+                if response is not None:
+                    print(json.dumps(response))
+                    sys.stdout.flush()
+                    print("发送响应完成", file=sys.stderr)
                 
             except json.JSONDecodeError as e:
                 error = {
@@ -0,0 +1,211 @@
+"""
+stdio 消息分帧：同一条流上支持两种帧格式，按每条消息的开头自动识别
+  - line:           每行一个JSON（默认；json.dumps 的输出不含换行）
+  - content-length: "Content-Length: N\r\n\r\n" 头部后跟 N 字节消息体（与LSP相同）
+FrameDecoder 在一个可复用的 bytearray 缓冲区上增量解析：已扫描过的数据不会重复扫描，
+每条消息只在取出消息体时复制一次，不受 StreamReader.readline 的64KiB行长限制；
+单条消息超过上限或帧头无效时丢弃该消息并抛出 FrameError，后续消息不受影响；
+message_id 从被丢弃或无法解析的消息开头恢复请求id，错误响应据此回显id
+"""
+
+import json
+import os
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+
+LINE = "line"
+CONTENT_LENGTH = "content-length"
+FRAMINGS = (LINE, CONTENT_LENGTH)
+
+# 单条消息的默认上限，可通过环境变量 MCP_MAX_MESSAGE_BYTES 调整
+DEFAULT_MAX_MESSAGE_BYTES = int(os.environ.get("MCP_MAX_MESSAGE_BYTES", 64 * 1024 * 1024))
+# 每次从管道读取的字节数
+READ_CHUNK_BYTES = 256 * 1024
+# content-length 帧头部的最大长度
+MAX_HEADER_BYTES = 1024
+# FrameError 保留的被丢弃消息开头的字节数
+ERROR_PREFIX_BYTES = 256
+
+_WHITESPACE = b" \t\r\n"
+
+
+# 消息开头的请求id：只识别第一个键（JSON-RPC 消息为 "jsonrpc" 之后的第一个键），嵌套在参数中的 "id" 不会被误认
+_LEADING_ID = re.compile(rb'\s*\{\s*(?:"jsonrpc"\s*:\s*"[^"]*"\s*,\s*)?"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")\s*[,}]')
+
+
+class FrameError(ValueError):
+    """消息帧无效或超过大小上限（该消息已被丢弃），prefix 为消息开头的字节（消息体未读到时为空）"""
+
+    def __init__(self, message: str, prefix: bytes = b""):
+        super().__init__(message)
+        self.prefix = prefix
+
+
+def message_id(data: bytes) -> Any:
+    """从消息开头恢复请求id，id 不是消息的第一个键或无法识别时返回None"""
+    match = _LEADING_ID.match(data)
+    return json.loads(match.group(1)) if match else None
+
+
+class FrameDecoder:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_MESSAGE_BYTES):
+        self.max_bytes = max_bytes
+        self.framing = LINE  # 最近一条消息的帧格式，回复时沿用
+        self._buffer = bytearray()
+        self._start = 0  # 未处理数据的起点
+        self._scan = 0  # 当前行已扫描到的位置（其前没有换行符）
+        self._body_length: Optional[int] = None  # 已解析头部、等待中的消息体长度
+        self._skip_bytes = 0  # 正在丢弃的超限 content-length 消息体剩余字节
+        self._skip_line = False  # 正在丢弃超限的行
+
+    def feed(self, data: bytes) -> None:
+        # 已处理的数据超过缓冲区一半时再整体前移，避免每条消息都移动剩余数据
+        if self._start and self._start * 2 >= len(self._buffer):
+            del self._buffer[:self._start]
+            self._scan -= self._start
+            self._start = 0
+        self._buffer += data
+
+    def _take(self, start: int, end: int) -> bytes:
+        with memoryview(self._buffer) as view, view[start:end] as body:
+            return bytes(body)
+
+    def next_frame(self) -> Optional[bytes]:
+        """取出下一条完整消息的消息体；数据不足时返回None"""
+        buffer = self._buffer
+        while True:
+            if self._skip_line:
+                newline = buffer.find(b"\n", self._scan)
+                if newline == -1:
+                    self._start = self._scan = len(buffer)
+                    return None
+                self._start = self._scan = newline + 1
+                self._skip_line = False
+
+            if self._skip_bytes:
+                skipped = min(self._skip_bytes, len(buffer) - self._start)
+                self._start += skipped
+                self._scan = self._start
+                self._skip_bytes -= skipped
+                if self._skip_bytes:
+                    return None
+
+            if self._body_length is not None:
+                end = self._start + self._body_length
+                if len(buffer) < end:
+                    return None
+                body = self._take(self._start, end)
+                self._start = self._scan = end
+                self._body_length = None
+                return body
+
+            # 跳过消息之间的空行
+            while self._start < len(buffer) and buffer[self._start] in _WHITESPACE:
+                self._start += 1
+            self._scan = max(self._scan, self._start)
+            if self._start == len(buffer):
+                return None
+
+            # JSON 不会以字母 C 开头，以此识别 content-length 帧头部
+            if buffer[self._start] in b"Cc":
+                header_end = buffer.find(b"\r\n\r\n", self._start, self._start + MAX_HEADER_BYTES)
+                if header_end == -1:
+                    if len(buffer) - self._start >= MAX_HEADER_BYTES:
+                        self._skip_line = True
+                        raise FrameError("消息头过长或格式错误")
+                    return None
+                length = None
+                for line in self._take(self._start, header_end).split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length" and value.strip().isdigit():
+                        length = int(value)
+                self._start = self._scan = header_end + 4
+                if length is None:
+                    raise FrameError("消息头缺少有效的 Content-Length")
+                self.framing = CONTENT_LENGTH
+                if length > self.max_bytes:
+                    self._skip_bytes = length
+                    raise FrameError(f"消息大小 {length} 字节超过上限 {self.max_bytes} 字节")
+                self._body_length = length
+                continue
+
+            newline = buffer.find(b"\n", self._scan)
+            if newline == -1:
+                self._scan = len(buffer)
+                if self._scan - self._start > self.max_bytes:
+                    self._skip_line = True
+                    raise FrameError(f"消息大小超过上限 {self.max_bytes} 字节",
+                                     self._take(self._start, self._start + ERROR_PREFIX_BYTES))
+                return None
+            size = newline - self._start
+            if size > self.max_bytes:
+                prefix = self._take(self._start, self._start + ERROR_PREFIX_BYTES)
+                self._start = self._scan = newline + 1
+                raise FrameError(f"消息大小 {size} 字节超过上限 {self.max_bytes} 字节", prefix)
+            self.framing = LINE
+            body = self._take(self._start, newline)
+            self._start = self._scan = newline + 1
+            return body
+
+
+def frame_body(body: bytes, framing: str = LINE) -> bytes:
+    """为已序列化的消息体分帧：line 帧追加换行，content-length 帧加上长度头部"""
+    if framing == CONTENT_LENGTH:
+        return b"Content-Length: %d\r\n\r\n" % len(body) + body
+    return body + b"\n"
+
+
+def encode_message(message: Any, framing: str = LINE) -> bytes:
+    """序列化一条消息并分帧，消息体只生成一次"""
+    return frame_body(json.dumps(message).encode("utf-8"), framing)
+
+
+def iter_frames(read_chunk: Callable[[], bytes], decoder: FrameDecoder) -> Iterator[Tuple[Optional[bytes], Optional[FrameError]]]:
+    """从阻塞读取函数中逐条产出 (消息体, None)；无效或超限的消息产出 (None, 错误)。read_chunk 返回空字节表示输入结束"""
+    while True:
+        data = read_chunk()
+        if not data:
+            return
+        decoder.feed(data)
+        while True:
+            try:
+                body = decoder.next_frame()
+            except FrameError as e:
+                yield None, e
+                continue
+            if body is None:
+                break
+            yield body, None
+
+
+def thread_reader(fd: int, size: int = READ_CHUNK_BYTES) -> Callable[[], Awaitable[bytes]]:
+    """
+    在专用线程中阻塞读取文件描述符，返回供 aiter_frames 使用的读取函数。
+    不使用事件循环的默认线程池：线程工具占满线程池时，输入（心跳、取消通知）仍能被及时读取
+    """
+    # 只有异步服务端调用，asyncio 已由调用方导入
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stdin-reader")
+
+    def read() -> Awaitable[bytes]:
+        return asyncio.get_running_loop().run_in_executor(executor, os.read, fd, size)
+    return read
+
+
+async def aiter_frames(read_chunk: Callable[[], Awaitable[bytes]], decoder: FrameDecoder) -> AsyncIterator[Tuple[Optional[bytes], Optional[FrameError]]]:
+    """iter_frames 的异步版本"""
+    while True:
+        data = await read_chunk()
+        if not data:
+            return
+        decoder.feed(data)
+        while True:
+            try:
+                body = decoder.next_frame()
+            except FrameError as e:
+                yield None, e
+                continue
+            if body is None:
+                break
+            yield body, None
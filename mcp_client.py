@@ -1,11 +1,21 @@
 import logging
+import os
 import uuid
 import asyncio
+import itertools
 import json
+import random
 import sys
-from typing import Dict, List, Any
+import time
+from collections import deque
+from typing import Dict, List, Any, AsyncIterator, Awaitable, Callable, Deque, Set, Tuple
 import click
 import aiohttp
+from adaptive_timeout import AdaptiveTimeouts
+from framing import DEFAULT_MAX_MESSAGE_BYTES, LINE, READ_CHUNK_BYTES, FrameDecoder, aiter_frames, encode_message
+from tool_calls import extract_tool_calls
+from tool_index import ToolIndex
+from typed_results import render_result
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional  # 添加Optional导入
 
@@ -16,32 +26,503 @@ class LLMConfig(BaseModel):
     model_name: str
     timeout: int = 180  # 超时时间（秒）
 
-class MCPClient:
-    def __init__(self, llm_config: LLMConfig):
+# 服务端繁忙错误码（与 mcp_server.SERVER_BUSY_CODE 一致），收到后退避重试
+SERVER_BUSY_CODE = -32001
+
+# 服务端协议：simple 为 mcp_server.py 的 {"type": ...} 协议，jsonrpc 为 JSON-RPC 2.0（Cline 风格）
+SIMPLE = "simple"
+JSONRPC = "jsonrpc"
+# simple 请求类型 -> JSON-RPC 方法
+JSONRPC_METHODS = {"initialize": "initialize", "list_tools": "tools/list", "call_tool": "tools/call"}
+
+class ServerCrashed(Exception):
+    """服务端进程意外退出"""
+
+
+def process_cpu_time(pid: int) -> Optional[float]:
+    """进程已使用的CPU时间（秒，读取 /proc/<pid>/stat），无法获取时（非Linux）返回None"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # 进程名可能包含空格和括号，从最后一个 ")" 之后开始按字段拆分：utime、stime 为其后第12、13个字段
+            fields = f.read().rsplit(b")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+class ServerConnection:
+    """
+    管理一个stdio服务端子进程：
+      - 后台读取stdout，按请求id分发响应，支持并发请求；notifications/progress 按 progressToken 分发给对应请求
+      - stdout 按块读取并增量分帧（每行一个JSON 或 Content-Length），支持数MB的大消息
+      - 后台持续排空stderr，只保留最近若干行（环形缓冲），避免管道写满导致服务端阻塞
+      - 监测进程退出，意外退出时自动重启并回调 on_restart（如刷新工具列表）
+      - 服务端繁忙时指数退避重试；进程崩溃时幂等请求在重启后透明重试
+      - protocol 为 jsonrpc 时，启动后先完成 initialize 握手，请求和响应在 {"type": ...} 与 JSON-RPC 2.0 之间转换
+      - 有请求在途时发送心跳 ping，服务端连续无响应且没有消耗CPU即视为卡死，强制结束进程并按崩溃处理（约1秒内发现）
+      - 给出 timeouts 时，每个工具（请求类型）的超时按其最近的耗时自适应计算，否则固定为 request_timeout
+    """
+    def __init__(self, command: List[str], request_timeout: float = 30, busy_retries: int = 3, busy_backoff: float = 0.05,
+                 max_restarts: int = 3, restart_backoff: float = 0.5, stderr_lines: int = 200,
+                 on_restart: Optional[Callable[[], Awaitable[None]]] = None,
+                 framing: str = LINE, max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES,
+                 protocol: str = SIMPLE, env: Optional[Dict[str, str]] = None,
+                 heartbeat_interval: float = 0.5, heartbeat_misses: int = 2,
+                 timeouts: Optional[AdaptiveTimeouts] = None):
+        if protocol not in (SIMPLE, JSONRPC):
+            raise ValueError(f"不支持的服务端协议: {protocol}")
+        self.command = command  # 启动命令
+        self.protocol = protocol  # 服务端协议：simple 或 jsonrpc
+        self.env = env  # 附加的环境变量
+        self.request_timeout = request_timeout  # 单个服务端请求的超时时间（秒）
+        self.busy_retries = busy_retries  # 服务端繁忙时的最大重试次数
+        self.busy_backoff = busy_backoff  # 首次重试前的等待时间（秒），之后指数增长
+        self.max_restarts = max_restarts  # 连续崩溃时的最大重启次数
+        self.restart_backoff = restart_backoff  # 首次重启前的等待时间（秒），之后指数增长
+        self.on_restart = on_restart
+        self.framing = framing  # 发送请求使用的帧格式：line 或 content-length
+        self.max_message_bytes = max_message_bytes  # 单条响应的最大字节数
+        self.heartbeat_interval = heartbeat_interval  # 心跳间隔及每次 ping 的等待时间（秒），0 表示不发送心跳
+        self.heartbeat_misses = heartbeat_misses  # 连续多少次 ping 无响应视为服务端卡死
+        self.timeouts = timeouts  # 按工具自适应的超时，None 表示固定使用 request_timeout
+        self.stalls = 0  # 因心跳超时被强制重启的次数
         self.process = None  # 服务端进程
-        self.tools: List[Dict[str, Any]] = []  # 工具列表 参考工具定义的json格式，使用字典列表存储数据
+        self.stderr_tail: Deque[str] = deque(maxlen=stderr_lines)  # 最近的stderr输出
+        self.restarts = 0  # 连续重启次数，进程稳定运行一段时间后清零
+        self._request_ids = itertools.count(1)  # 请求id，用于匹配并发请求的响应
+        self._pending: Dict[int, asyncio.Future] = {}  # 等待响应的请求
+        self._progress: Dict[int, Callable[[Dict[str, Any]], None]] = {}  # 流式请求的进度回调，progressToken 即请求id
+        self._tasks: List[asyncio.Task] = []  # 读取/排空/监测等后台任务
+        self._ready = asyncio.Event()  # 进程可用（启动完成且未崩溃）
+        self._closing = False
+        self._failure: Optional[str] = None  # 重启次数耗尽后的失败原因
+        self._started_at = 0.0
+        self._last_received = 0.0  # 最近一次收到服务端输出的时间
+
+    """启动服务端进程及后台任务"""
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,  # 标准异步输入
+            stdout=asyncio.subprocess.PIPE,  # 标准异步输出
+            stderr=asyncio.subprocess.PIPE,   #标准错误管道，由后台任务持续排空
+            env={**os.environ, **self.env} if self.env else None,
+        )
+        self._started_at = self._last_received = time.monotonic()
+        process = self.process
+        self._tasks = [
+            asyncio.create_task(self._read_responses(process)),
+            asyncio.create_task(self._drain_stderr(process)),
+            asyncio.create_task(self._watch_exit(process)),
+        ]
+        if self.heartbeat_interval > 0:
+            self._tasks.append(asyncio.create_task(self._heartbeat(process)))
+        self._ready.set()
+        if self.protocol == JSONRPC:
+            await self._initialize()
+
+    """JSON-RPC 服务端的 initialize 握手（重启后重新握手）"""
+    async def _initialize(self) -> None:
+        response = await self._send_once({
+            "type": "initialize",
+            "protocolVersion": "2025-03-26",
+            "capabilities": {},
+            "clientInfo": {"name": "mcp_client", "version": "1.0.0"}
+        })
+        if response.get("type") == "error":
+            raise ServerCrashed(f"initialize 失败: {response.get('message', '未知错误')}")
+        self.process.stdin.write(encode_message({"jsonrpc": "2.0", "method": "notifications/initialized"}, self.framing))
+
+    """把 {"type": ...} 请求转换为服务端协议的消息"""
+    def _to_wire(self, request: Dict[str, Any], request_id: int) -> Dict[str, Any]:
+        if self.protocol == SIMPLE:
+            # id 放在第一个键：消息无法解析时服务端可以从消息开头恢复id（见 framing.message_id）
+            return {"id": request_id, **{key: value for key, value in request.items() if key != "id"}}
+        request_type = request.get("type")
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": JSONRPC_METHODS.get(request_type, request_type),
+            "params": {key: value for key, value in request.items() if key != "type"}
+        }
+
+    """把服务端协议的响应转换为 {"type": ...} 响应"""
+    def _from_wire(self, request: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+        if self.protocol == SIMPLE:
+            return response
+        error = response.get("error")
+        if error is not None:
+            return {"type": "error", "code": error.get("code"), "message": error.get("message", "未知错误")}
+        result = response.get("result") or {}
+        if request.get("type") == "list_tools":
+            return {"type": "tool_list", "tools": result.get("tools", [])}
+        if request.get("type") == "call_tool":
+            return {"type": "tool_response", "name": request.get("name"), **result}
+        return {"type": "result", **result}
+
+    """最近的stderr输出，用于错误信息"""
+    def last_stderr(self, lines: int = 5) -> str:
+        return " | ".join(list(self.stderr_tail)[-lines:])
+
+    """后台读取服务端输出，按请求id分发响应"""
+    async def _read_responses(self, process) -> None:
+        error: Exception = ServerCrashed("服务端已关闭输出")
+        decoder = FrameDecoder(self.max_message_bytes)
+        try:
+            # 按块读取标准输出并增量分帧，每条消息只复制一次
+            async for body, frame_error in aiter_frames(lambda: process.stdout.read(READ_CHUNK_BYTES), decoder):
+                self._last_received = time.monotonic()
+                if frame_error is not None:
+                    logging.warning(f"忽略无效的服务端输出: {str(frame_error)}")
+                    continue
+                try:
+                    response = json.loads(body)
+                except ValueError:
+                    logging.warning(f"忽略无法解析的服务端输出: {body[:200]!r}")
+                    continue
+                if not isinstance(response, dict):
+                    continue
+                if response.get("method") == "notifications/progress":
+                    params = response.get("params") or {}
+                    callback = self._progress.get(params.get("progressToken"))
+                    if callback is not None:
+                        callback(params)
+                    continue
+                # 只按id匹配：不带id的响应（如服务端无法恢复id的消息错误）不猜测对应的请求，该请求由超时处理
+                if "id" not in response or response["id"] is None:
+                    logging.warning(f"忽略不带id的服务端响应: {body[:200]!r}")
+                    continue
+                future = self._pending.pop(response["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+            error = ServerCrashed(f"服务端已关闭输出，stderr: {self.last_stderr()}")
+        except Exception as e:
+            error = ServerCrashed(f"通信错误: {str(e)}")
+        finally:
+            if process is self.process and not self._closing:
+                self._ready.clear()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    """持续读取stderr，只保留最近的若干行"""
+    async def _drain_stderr(self, process) -> None:
+        while True:
+            try:
+                line = await process.stderr.readline()
+            except ValueError:
+                # 单行超过缓冲上限，已被丢弃，继续读取
+                continue
+            if not line:
+                break
+            self.stderr_tail.append(line.decode('utf-8', errors='replace').rstrip())
+
+    """
+    心跳：有请求在途、且超过 heartbeat_interval 没有收到服务端任何输出时发送 ping（任何响应，包括错误，都说明服务端仍在读取和应答）。
+    各服务端在读取输入的线程/循环中直接应答 ping，与请求处理无关：ping 无应答说明服务端停止了读取输入。
+    等待期间服务端进程仍在消耗CPU（如在事件循环中解析大消息）时视为忙碌，不计入；
+    连续 heartbeat_misses 次 ping 无响应且没有消耗CPU时视为卡死：在途请求立即以 ServerCrashed 失败，结束进程后由 _watch_exit 重启
+    """
+    async def _heartbeat(self, process) -> None:
+        interval = self.heartbeat_interval
+        misses = 0
+        while process is self.process and process.returncode is None and not self._closing:
+            idle = time.monotonic() - self._last_received
+            if not self._pending or idle < interval:
+                misses = 0
+                await asyncio.sleep(interval - idle if self._pending else interval)
+                continue
+            cpu = process_cpu_time(process.pid)
+            try:
+                answered = await self._ping(process, interval)
+            except Exception:
+                return  # 进程已退出或输入已关闭，由 _watch_exit 处理
+            if answered:
+                misses = 0
+                continue
+            if cpu is not None and (process_cpu_time(process.pid) or 0) > cpu:
+                misses = 0  # 服务端忙碌而不是卡死
+                continue
+            misses += 1
+            if misses >= self.heartbeat_misses:
+                self._stalled(process, f"服务端无响应（连续{misses}次心跳超时且未消耗CPU，每次{interval}秒），stderr: {self.last_stderr()}")
+                return
+
+    """发送一次 ping，timeout 秒内收到响应返回True"""
+    async def _ping(self, process, timeout: float) -> bool:
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            process.stdin.write(encode_message(self._to_wire({"type": "ping"}, request_id), self.framing))
+            await asyncio.wait_for(future, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._pending.pop(request_id, None)
+
+    """服务端卡死：让在途请求立即失败（幂等请求在重启后重试），强制结束进程"""
+    def _stalled(self, process, reason: str) -> None:
+        self.stalls += 1
+        logging.warning(reason)
+        error = ServerCrashed(reason)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+        self._ready.clear()
+        process.kill()
+
+    """监测进程退出，意外退出时自动重启"""
+    async def _watch_exit(self, process) -> None:
+        returncode = await process.wait()
+        if self._closing or process is not self.process:
+            return
+        self._ready.clear()
+        # 稳定运行超过1分钟后再崩溃，视为新的故障，重新计算重启次数
+        if time.monotonic() - self._started_at > 60:
+            self.restarts = 0
+        logging.warning(f"服务端进程意外退出（退出码: {returncode}），stderr: {self.last_stderr()}")
+
+        while self.restarts < self.max_restarts and not self._closing:
+            await asyncio.sleep(self.restart_backoff * (2 ** self.restarts))
+            self.restarts += 1
+            try:
+                await self.start()
+            except Exception as e:
+                logging.error(f"重启服务端失败: {str(e)}")
+                continue
+            if self.on_restart:
+                try:
+                    await self.on_restart()
+                except Exception as e:
+                    logging.error(f"服务端重启回调失败: {str(e)}")
+            return
+
+        self._failure = f"服务端进程已退出（退出码: {returncode}），重启次数已用尽，stderr: {self.last_stderr()}"
+        self._ready.set()  # 唤醒等待中的请求，让其立即失败
+
+    """
+    发送一次请求并等待对应id的响应，进程不可用时抛出 ServerCrashed；给出 on_progress 时请求服务端流式返回分块。
+    timeout 为等待响应的超时（秒），默认 request_timeout
+    """
+    async def _send_once(self, request: Dict[str, Any],
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        timeout = timeout or self.request_timeout
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            raise ServerCrashed(f"等待服务端重启超时（{self.request_timeout}秒）")
+        if self._failure:
+            raise ServerCrashed(self._failure)
+        process = self.process
+        if process.returncode is not None:
+            raise ServerCrashed(f"服务端进程已退出（退出码: {process.returncode}）")
+
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        activity = [0]  # 收到的进度通知数，流式请求每收到一个分块重新计算超时
+        if on_progress is not None:
+            def track_progress(params: Dict[str, Any]) -> None:
+                activity[0] += 1
+                on_progress(params)
+            self._progress[request_id] = track_progress
+            request = {**request, "_meta": {"progressToken": request_id}}
+        try:
+            request_bytes = encode_message(self._to_wire(request, request_id), self.framing)    #转成json格式并分帧
+            try:
+                process.stdin.write(request_bytes)
+                await process.stdin.drain()   #序列化并写入进程
+            except (BrokenPipeError, ConnectionResetError) as e:
+                raise ServerCrashed(f"写入服务端失败: {str(e)}")
+            while True:
+                seen = activity[0]
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+                    return self._from_wire(request, response)
+                except asyncio.TimeoutError:
+                    if activity[0] == seen:
+                        raise
+        except asyncio.TimeoutError:
+            self._send_cancel(request_id, f"请求超时（{timeout:g}秒）")
+            return {"type": "error", "message": f"请求超时（{timeout:g}秒）"}
+        except asyncio.CancelledError:
+            self._send_cancel(request_id, "客户端取消请求")
+            raise
+        except ServerCrashed:
+            raise
+        except Exception as e:
+            return {"type": "error", "message": f"通信错误: {str(e)}"}
+        finally:
+            self._pending.pop(request_id, None)
+            self._progress.pop(request_id, None)
+
+    """通知服务端取消请求（notifications/cancelled），让服务端停止仍在运行的工具"""
+    def _send_cancel(self, request_id: int, reason: str) -> None:
+        if not self.process or self.process.returncode is not None:
+            return
+        notification = {
+            "jsonrpc": "2.0",
+            "method": "notifications/cancelled",
+            "params": {"requestId": request_id, "reason": reason}
+        }
+        try:
+            self.process.stdin.write(encode_message(notification, self.framing))
+        except Exception as e:
+            logging.warning(f"发送取消通知失败: {str(e)}")
+
+    """自适应超时的统计键：工具调用按工具名，其他请求按类型"""
+    def _timeout_key(self, request: Dict[str, Any]) -> str:
+        if request.get("type") == "call_tool":
+            return f"call_tool:{request.get('name')}"
+        return str(request.get("type"))
+
+    """
+    发送请求：服务端繁忙时指数退避重试；进程崩溃时，幂等请求等待重启后重试。
+    启用自适应超时时，按该工具最近的耗时确定本次超时并记录本次耗时（超时的调用按已等待的时间记录）；
+    流式请求的超时限制分块间隔，仍使用 request_timeout
+    """
+    async def send_request(self, request: Dict[str, Any], idempotent: bool = False,
+                           on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        busy_attempts = 0
+        crash_attempts = 0
+        key = self._timeout_key(request) if self.timeouts is not None and on_progress is None else None
+        while True:
+            try:
+                started = time.perf_counter()
+                response = await self._send_once(request, on_progress, self.timeouts.timeout(key) if key else None)
+            except ServerCrashed as e:
+                if idempotent and not self._closing and not self._failure and crash_attempts < self.max_restarts:
+                    crash_attempts += 1
+                    continue
+                return {"type": "error", "message": f"无响应，错误: {str(e)}"}
+
+            if key is not None and response.get("code") != SERVER_BUSY_CODE:
+                self.timeouts.observe(key, time.perf_counter() - started)
+            if response.get("code") == SERVER_BUSY_CODE and busy_attempts < self.busy_retries:
+                # 加入随机抖动，避免多个请求同时重试再次压垮服务端
+                await asyncio.sleep(self.busy_backoff * (2 ** busy_attempts) * random.uniform(0.5, 1.5))
+                busy_attempts += 1
+                continue
+            return response
+
+    """关闭服务端进程并回收后台任务"""
+    async def close(self) -> None:
+        self._closing = True
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+class CatalogueEntry:
+    """合并工具目录中的一项：对外工具名 -> 所属服务端、服务端上的工具名和工具定义"""
+    __slots__ = ("server", "remote_name", "tool")
+
+    def __init__(self, server: str, remote_name: str, tool: Dict[str, Any]):
+        self.server = server
+        self.remote_name = remote_name
+        self.tool = tool
+
+    @property
+    def idempotent(self) -> bool:
+        return bool(self.tool.get("annotations", {}).get("idempotentHint"))
+
+"""
+读取 demo_cline_mcp_settings.json 风格的服务端配置：
+  {"servers": {"名称": {"command": "python3", "args": [...], "env": {...}, "protocol": "jsonrpc", "disabled": false}}}
+protocol 默认为 jsonrpc（Cline 配置中的服务端均为 JSON-RPC 2.0），mcp_server.py 需要写 "simple"
+"""
+def load_server_settings(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        settings = json.load(f)
+    servers = settings.get("servers") or settings.get("mcpServers") or {}
+    if not isinstance(servers, dict) or not servers:
+        raise ValueError(f"配置文件 {path} 中没有 servers")
+    return servers
+
+class MCPClient:
+    def __init__(self, llm_config: LLMConfig, request_timeout: float = 30, busy_retries: int = 3, busy_backoff: float = 0.05,
+                 max_restarts: int = 3, framing: str = LINE, max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES,
+                 tool_top_k: Optional[int] = 8, timeout_floor: float = 1.0, timeout_ceiling: float = 300.0,
+                 timeout_multiplier: float = 3.0, heartbeat_interval: float = 0.5):
+        self.servers: Dict[str, ServerConnection] = {}  # 服务端名称 -> 连接（进程管理、请求收发），按配置顺序
+        self.server_tools: Dict[str, List[Dict[str, Any]]] = {}  # 服务端名称 -> 该服务端的工具列表
+        self.catalogue: Dict[str, CatalogueEntry] = {}  # 合并后的工具目录，按对外工具名索引
+        self.tools: List[Dict[str, Any]] = []  # 工具列表 参考工具定义的json格式，使用字典列表存储数据（合并后，重名工具已加服务端前缀）
         self.connected = False #标示连接状态
         self.llm_config = llm_config  # 大模型参数配置
         self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=llm_config.timeout))  # 创建异步对话 超时时间与LLM一致
+        self.request_timeout = request_timeout  # 单个服务端请求的超时时间（秒），工具的耗时样本不足时使用
+        # 自适应超时：工具调用的超时为最近 p99 耗时 × timeout_multiplier，限制在 [timeout_floor, timeout_ceiling] 秒之间
+        self.timeout_floor = timeout_floor
+        self.timeout_ceiling = timeout_ceiling
+        self.timeout_multiplier = timeout_multiplier
+        self.heartbeat_interval = heartbeat_interval  # 服务端心跳间隔（秒），0 表示不发送心跳
+        self.busy_retries = busy_retries  # 服务端繁忙时的最大重试次数
+        self.busy_backoff = busy_backoff  # 首次重试前的等待时间（秒），之后指数增长
+        self.max_restarts = max_restarts  # 服务端崩溃后的最大自动重启次数
+        self.framing = framing  # 消息帧格式：line（每行一个JSON）或 content-length
+        self.max_message_bytes = max_message_bytes  # 单条服务端响应的最大字节数
+        # 工具数超过该值时，系统提示词只包含与查询最相关的 tool_top_k 个工具；None 表示始终包含全部工具
+        self.tool_top_k = tool_top_k
+        self._tool_index: Optional[ToolIndex] = None  # 工具检索索引，工具目录变化后重新建立
 
-    """连接到MCP服务端并初始化工具列表"""
+    @property
+    def server(self) -> Optional[ServerConnection]:
+        """第一个服务端连接（单服务端时即唯一的连接）"""
+        return next(iter(self.servers.values()), None)
+
+    @property
+    def process(self):
+        """服务端进程（重启后为新进程）"""
+        return self.server.process if self.server else None
+
+    """连接到MCP服务端脚本（mcp_server.py 的 simple 协议）并初始化工具列表"""
     async def connect(self, server_path: str) -> bool:
+        name = os.path.splitext(os.path.basename(server_path))[0]
+        return await self.connect_servers({
+            name: {"command": sys.executable, "args": [server_path], "protocol": SIMPLE}    #python解释器路径 服务端脚本路径
+        })
+
+    """
+    并行启动多个服务端并合并工具列表。servers 为 load_server_settings 返回的配置，
+    启动失败的服务端会被跳过，全部失败时连接失败
+    """
+    async def connect_servers(self, servers: Dict[str, Dict[str, Any]]) -> bool:
         try:
-            # 启动服务端进程
-            self.process = await asyncio.create_subprocess_exec(
-                sys.executable, server_path,    #python解释器路径 服务端脚本路径
-                stdin=asyncio.subprocess.PIPE,  # 标准异步输入 
-                stdout=asyncio.subprocess.PIPE,  # 标准异步输出
-                stderr=asyncio.subprocess.PIPE,   #标准错误管道
-                text=False     #非文本模式，二进制模式
-            )
+            connections = {
+                name: self._create_connection(name, spec)
+                for name, spec in servers.items() if not spec.get("disabled")
+            }
+            if not connections:
+                raise Exception("没有可用的服务端配置")
+            names = list(connections)
+            # 各服务端的启动和工具列表请求并行进行，总耗时取决于最慢的服务端
+            results = await asyncio.gather(*(self._start_server(connections[name]) for name in names),
+                                           return_exceptions=True)
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    click.echo(f"⚠️ 服务端 {name} 启动失败: {str(result)}")
+                    await connections[name].close()
+                    continue
+                self.servers[name] = connections[name]
+                self.server_tools[name] = result
+            if not self.servers:
+                raise Exception("所有服务端均启动失败")
             self.connected = True
-            click.echo("🔗 已连接到MCP服务端")
+            self._rebuild_catalogue()
+            click.echo(f"🔗 已连接到MCP服务端: {', '.join(self.servers)}")
+            click.echo(f"🔧 可用工具: {list(self.catalogue)}")   # f 在字符串中嵌入变量
 
-            # 获取工具列表
-            self.tools = await self.list_tools()      # 异步执行，在执行函数connect时执行list_tools()
-            click.echo(f"🔧 可用工具: {[t['name'] for t in self.tools]}")   # f 在字符串中嵌入变量
-            
             # 测试LLM连接
             await self.test_llm_connection()  #异步执行连接测试
             return True
@@ -50,6 +531,58 @@ class MCPClient:
             await self.disconnect()  # 确保资源释放
             return False
 
+    """按配置创建服务端连接"""
+    def _create_connection(self, name: str, spec: Dict[str, Any]) -> ServerConnection:
+        if not spec.get("command"):
+            raise ValueError(f"服务端 {name} 缺少 command")
+
+        async def on_restart() -> None:
+            await self._on_server_restart(name)
+
+        return ServerConnection(
+            [spec["command"], *spec.get("args", [])],
+            request_timeout=self.request_timeout,
+            busy_retries=self.busy_retries,
+            busy_backoff=self.busy_backoff,
+            max_restarts=self.max_restarts,
+            on_restart=on_restart,
+            framing=self.framing,
+            max_message_bytes=self.max_message_bytes,
+            protocol=spec.get("protocol", JSONRPC),
+            env=spec.get("env"),
+            heartbeat_interval=self.heartbeat_interval,
+            # 每个服务端单独统计各工具的耗时
+            timeouts=AdaptiveTimeouts(self.request_timeout, floor=self.timeout_floor, ceiling=self.timeout_ceiling,
+                                      multiplier=self.timeout_multiplier)
+        )
+
+    """启动一个服务端并获取其工具列表"""
+    async def _start_server(self, connection: ServerConnection) -> List[Dict[str, Any]]:
+        await connection.start()
+        return await self._list_server_tools(connection)
+
+    """
+    合并各服务端的工具列表，按工具名建立索引。工具名冲突时按配置顺序，
+    先出现的保留原名，之后的改名为 "服务端名.工具名"
+    """
+    def _rebuild_catalogue(self) -> None:
+        catalogue: Dict[str, CatalogueEntry] = {}
+        for server_name, tools in self.server_tools.items():
+            for tool in tools:
+                name = tool.get("name")
+                if not name:
+                    continue
+                exposed = name
+                if exposed in catalogue:
+                    exposed = f"{server_name}.{name}"
+                    if exposed not in self.catalogue:  # 刷新工具列表时不重复提示
+                        logging.warning(f"工具名冲突: {name} 已由服务端 {catalogue[name].server} 提供，"
+                                        f"服务端 {server_name} 的同名工具改名为 {exposed}")
+                    tool = {**tool, "name": exposed}
+                catalogue[exposed] = CatalogueEntry(server_name, name, tool)
+        self.catalogue = catalogue
+        self.tools = [entry.tool for entry in catalogue.values()]
+        self._tool_index = None
     """测试与LLM模型的连接"""
     async def test_llm_connection(self) -> None:
         click.echo(f"📡 测试LLM模型连接 ({self.llm_config.model_name})...")
@@ -93,40 +626,58 @@ class MCPClient:
                 raise Exception(f"LLM调用失败 [状态码: {resp.status}]: {await resp.text()}")
             return await resp.json()    #若请求成功，返回详细信息
 
-    """发送请求到服务端并获取响应"""
+    """
+    发送请求到服务端并获取响应；服务端崩溃重启后，幂等请求会被自动重试。
+    工具调用按工具目录路由到提供该工具的服务端，其他请求发往第一个服务端
+    """
     async def send_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        if not self.connected or not self.process:
+        if not self.connected or not self.servers:
             raise Exception("未连接到服务端")
-
-        try:
-            request_str = json.dumps(request) + "\n"    #转成json格式
-            self.process.stdin.write(request_str.encode('utf-8'))   #使用utf-8编码
-            await self.process.stdin.drain()   #序列化并写入进程
-
-            response_bytes = await asyncio.wait_for(
-                self.process.stdout.readline(),    #读取标准输出
-                timeout=30
+        if request.get("type") == "call_tool":
+            entry = self.catalogue.get(request.get("name"))
+            if entry is None:
+                return {"type": "error", "message": f"工具 '{request.get('name')}' 不存在"}
+            return await self.servers[entry.server].send_request(
+                {**request, "name": entry.remote_name}, idempotent=entry.idempotent
             )
-            if not response_bytes:
-                err_bytes = await self.process.stderr.readline()    #读取错误信息
-                err_str = err_bytes.decode('utf-8').strip()    #解码错误信息
-                return {"type": "error", "message": f"无响应，错误: {err_str}"}    #输出
+        return await self.server.send_request(request, idempotent=self._is_idempotent(request))
 
-            return json.loads(response_bytes.decode('utf-8').strip())
-        except asyncio.TimeoutError:
-            return {"type": "error", "message": "请求超时（30秒）"}
-        except Exception as e:
-            return {"type": "error", "message": f"通信错误: {str(e)}"}
+    """判断请求是否可以安全重试：工具列表请求，以及服务端标注了 idempotentHint 的工具调用"""
+    def _is_idempotent(self, request: Dict[str, Any]) -> bool:
+        if request.get("type") == "list_tools":
+            return True
+        if request.get("type") == "call_tool":
+            entry = self.catalogue.get(request.get("name"))
+            return entry is not None and entry.idempotent
+        return False
 
-    """获取服务端工具列表"""
-    async def list_tools(self) -> List[Dict[str, Any]]:
-        response = await self.send_request({"type": "list_tools"})    #分type tools两个字典
-        # print("aaaaaaa查看tool_list:",response)
+    """服务端重启后刷新该服务端的工具列表"""
+    async def _on_server_restart(self, name: str) -> None:
+        connection = self.servers.get(name)
+        if connection is None:
+            return
+        self.server_tools[name] = await self._list_server_tools(connection)
+        self._rebuild_catalogue()
+        click.echo(f"🔄 服务端 {name} 已重启，可用工具: {[t['name'] for t in self.server_tools[name]]}")
+
+    """获取一个服务端的工具列表"""
+    async def _list_server_tools(self, connection: ServerConnection) -> List[Dict[str, Any]]:
+        response = await connection.send_request({"type": "list_tools"}, idempotent=True)    #分type tools两个字典
         if response.get("type") == "tool_list":
             return response.get("tools", [])   #只保留tools的字典
         else:
             raise Exception(f"获取工具失败: {response.get('message', '未知错误')}")
 
+    """并行刷新所有服务端的工具列表，返回合并后的工具列表"""
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        if not self.connected or not self.servers:
+            raise Exception("未连接到服务端")
+        names = list(self.servers)
+        tools = await asyncio.gather(*(self._list_server_tools(self.servers[name]) for name in names))
+        self.server_tools.update(zip(names, tools))
+        self._rebuild_catalogue()
+        return self.tools
+
     """调用服务端工具"""
     async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         print("调用服务端工具信息")
@@ -136,14 +687,50 @@ class MCPClient:
             "arguments": args
         })
 
-    #处理用户查询
-    async def process_query(self, query: str) -> str:
+    """
+    流式调用服务端工具（生成器工具），以异步迭代器逐个产出分块的带类型结果；
+    提前结束迭代时通知服务端取消。工具失败时抛出异常
+    用法: async for chunk in client.stream_tool("name", {...}): ...
+    """
+    async def stream_tool(self, tool_name: str, args: Dict[str, Any]) -> AsyncIterator[Any]:
+        if not self.connected or not self.servers:
+            raise Exception("未连接到服务端")
+        entry = self.catalogue.get(tool_name)
+        if entry is None:
+            raise Exception(f"工具 '{tool_name}' 不存在")
+        chunks: asyncio.Queue = asyncio.Queue()
+        # 已产出的分块无法撤回，崩溃后不自动重试
+        request = asyncio.create_task(self.servers[entry.server].send_request(
+            {"type": "call_tool", "name": entry.remote_name, "arguments": args},
+            on_progress=chunks.put_nowait
+        ))
+        try:
+            while True:
+                getter = asyncio.ensure_future(chunks.get())
+                await asyncio.wait({getter, request}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                yield (getter.result().get("structuredContent") or {}).get("result")
+            # 响应之前发出的分块已全部入队
+            while not chunks.empty():
+                yield (chunks.get_nowait().get("structuredContent") or {}).get("result")
+            response = request.result()
+            if response.get("type") == "error":
+                raise Exception(f"工具调用失败: {response.get('message', '未知错误')}")
+        finally:
+            if not request.done():
+                request.cancel()
+                await asyncio.gather(request, return_exceptions=True)
+
+    #处理用户查询；raise_errors 为 True 时出错直接抛出异常（批量模式据此记录失败），否则返回错误说明文字
+    async def process_query(self, query: str, raise_errors: bool = False) -> str:
         messages = [{"role": "user", "content": query}]     #初始messages 用户角色+用户需求提示词
         final_response = "⚠️ 未生成有效回答"    #设置最终回答初始值
 
         try:
             # 1. 获取初始LLM响应
-            system_prompt = self._build_system_prompt()       #构建系统提示词：服务端工具信息   包括服务端的工具名称+必填参数
+            system_prompt = self._build_system_prompt(query)       #构建系统提示词：与查询相关的服务端工具信息   包括服务端的工具名称+必填参数
             initial_messages = [{"role": "system", "content": system_prompt}] + messages     #初始信息包括系统提示词和用户提示词
             initial_response = await self.call_llm(initial_messages)    #将提示词输入到LLM中
             print("检查 initial_response:",initial_response)
@@ -195,60 +782,69 @@ class MCPClient:
 
             # 5. 获取最终响应
             final_messages = [{"role": "system", "content": system_prompt}] + messages  #将工具返回结果再次放入AI中
-            final_response = await self._get_final_response(final_messages)  #使用AI获取最终结果
+            final_response = await self._get_final_response(final_messages, raise_errors)  #使用AI获取最终结果
             
             return final_response
 
         except Exception as e:
             logging.error(f"处理查询失败: {str(e)}")
+            if raise_errors:
+                raise
             return f"处理查询时出错: {str(e)}"
 
-    """解析内容中的工具调用"""
+    """
+    解析内容中的工具调用：一次扫描找出回复中任意位置（代码块内或说明文字之间）的JSON，
+    接受 tool_calls 列表、OpenAI function 格式和单个调用对象，统一为 {"tool_name", "parameters"}（见 tool_calls）
+    """
     def _parse_tool_calls(self, content: str) -> List[Dict]:
-        if not content:
-            return []
-
-        # 尝试提取JSON代码块
-        json_str = self._extract_json_block(content)   #返回tool_calls的json格式信息
-        if not json_str:    #如果输入内容为空 直接返回空列表
-            json_str = content
-
-        try:
-            data = json.loads(json_str)   #转换为python可解释对象
-            if isinstance(data, dict):    #若为字典类型
-                calls = data.get("tool_calls", [])   #提取工具使用信息
-                return [calls] if isinstance(calls, dict) else calls    #若为字典，包装成列表返回，若不是，直接返回calls
-        except json.JSONDecodeError:
-            pass
-        
-        return []
-
-    """从内容中提取JSON代码块"""
-    def _extract_json_block(self, content: str) -> Optional[str]:
-        if content.startswith("```json") and content.endswith("```"):
-            return content[7:-3].strip()
-        return None
+        return extract_tool_calls(content, self.catalogue)
 
     """标准化工具响应格式"""
     def _format_tool_response(self, response: Dict) -> str:
+        """
+        把工具响应渲染为紧凑的tool消息：优先使用带类型的 structuredContent
+        （去掉类型包装、输出无空白JSON），其次拼接 content 中的文本块
+        """
         if response.get("type") == "error":
             return f"错误: {response.get('message', '未知错误')}"
-        return str(response.get("content", response))
+        structured = response.get("structuredContent")
+        if isinstance(structured, dict) and "result" in structured:
+            return render_result(structured["result"])
+        content = response.get("content")
+        if isinstance(content, list):
+            texts = [block.get("text", "") for block in content if isinstance(block, dict) and "text" in block]
+            if texts:
+                return "\n".join(texts)
+        return render_result(content if content is not None else response)
 
     """获取LLM的最终响应"""
-    async def _get_final_response(self, messages: List[Dict]) -> str:
+    async def _get_final_response(self, messages: List[Dict], raise_errors: bool = False) -> str:
         try:
             response = await self.call_llm(messages)
             return response["choices"][0]["message"].get("content", "无回答")
         except Exception as e:
             logging.error(f"获取最终响应失败: {str(e)}")
+            if raise_errors:
+                raise
             return "无法生成最终响应"
 
 
+    """
+    选出放入系统提示词的工具：工具数不超过 tool_top_k 时全部放入，
+    否则用 BM25 索引选出与查询最相关的 tool_top_k 个；未命中任何工具时退回完整工具列表
+    """
+    def _select_tools(self, query: Optional[str]) -> List[Dict[str, Any]]:
+        if not query or not self.tool_top_k or len(self.tools) <= self.tool_top_k:
+            return self.tools
+        if self._tool_index is None:
+            self._tool_index = ToolIndex(self.tools)
+        selected = self._tool_index.search(query, self.tool_top_k)
+        return self.tools if selected is None else selected
+
     """构建系统提示词（指导LLM如何使用工具）"""
-    def _build_system_prompt(self) -> str:
+    def _build_system_prompt(self, query: Optional[str] = None) -> str:
         tool_descriptions = []
-        for tool in self.tools:
+        for tool in self._select_tools(query):
             props = tool["inputSchema"]["properties"]   #输入表格的属性配置
             required = tool["inputSchema"].get("required", [])
             tool_descriptions.append(
@@ -273,30 +869,146 @@ class MCPClient:
     async def disconnect(self):
         """断开连接并清理资源"""
         await self.session.close()
-        if self.process:
-            self.process.terminate()
-            await self.process.wait()
+        if self.servers:
+            await asyncio.gather(*(server.close() for server in self.servers.values()), return_exceptions=True)
         self.connected = False
         click.echo("🔌 已断开连接")
 
 
+"""
+读取批量查询JSONL：每行 {"query": "...", "id": ...}，id 可选（默认为行号），也接受纯字符串行。
+格式错误或id重复时在开始处理前报错
+"""
+def load_batch_queries(path: str) -> List[Tuple[Any, str]]:
+    queries: List[Tuple[Any, str]] = []
+    seen: Set[str] = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} 第{line_number}行不是有效的JSON: {str(e)}")
+            if isinstance(item, dict):
+                if not isinstance(item.get("query"), str):
+                    raise ValueError(f"{path} 第{line_number}行缺少 query")
+                query_id, query = item.get("id", line_number), item["query"]
+            else:
+                query_id, query = line_number, str(item)
+            key = json.dumps(query_id, ensure_ascii=False)
+            if key in seen:
+                raise ValueError(f"{path} 第{line_number}行的id重复: {key}")
+            seen.add(key)
+            queries.append((query_id, query))
+    return queries
+
+"""读取已有的结果文件，返回已成功完成的查询id；中断时未写完的行会被忽略"""
+def load_completed(path: str) -> Set[str]:
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "id" in record and "error" not in record:
+                completed.add(json.dumps(record["id"], ensure_ascii=False))
+    return completed
+
+"""
+批量处理查询：多个查询共用一个客户端，以 concurrency 个并发任务调用 process_query（出错时抛出异常，记为 error），
+每完成一条立即追加一行结果到 output_path（{"id", "query", "result" 或 "error", "elapsed_ms"}）。
+再次运行时跳过结果文件中已成功的查询，中断后可以继续；失败的查询会重新处理，结果以最后一行为准
+"""
+async def run_batch(client: MCPClient, input_path: str, output_path: str, concurrency: int = 4,
+                    echo: Callable[[str], None] = click.echo) -> Dict[str, Any]:
+    queries = load_batch_queries(input_path)
+    completed = load_completed(output_path)
+    pending = [(query_id, query) for query_id, query in queries
+               if json.dumps(query_id, ensure_ascii=False) not in completed]
+    summary = {"total": len(queries), "skipped": len(queries) - len(pending), "processed": 0, "errors": 0}
+    echo(f"📋 共 {summary['total']} 条查询，已完成 {summary['skipped']} 条，待处理 {len(pending)} 条")
+
+    # 上次中断时可能留下未写完的行，先补上换行，避免与新结果粘在一起
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    started = time.perf_counter()
+    remaining = iter(pending)
+    with open(output_path, "a", encoding="utf-8") as output:
+        if needs_newline:
+            output.write("\n")
+
+        async def worker() -> None:
+            for query_id, query in remaining:
+                query_started = time.perf_counter()
+                record: Dict[str, Any] = {"id": query_id, "query": query}
+                try:
+                    record["result"] = await client.process_query(query, raise_errors=True)
+                except Exception as e:
+                    record["error"] = str(e)
+                    summary["errors"] += 1
+                record["elapsed_ms"] = round((time.perf_counter() - query_started) * 1000, 3)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                summary["processed"] += 1
+                status = "❌" if "error" in record else "✅"
+                echo(f"{status} [{summary['processed']}/{len(pending)}] {query_id} ({record['elapsed_ms']:.0f}ms)")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["queries_per_s"] = round(summary["processed"] / elapsed, 3) if elapsed > 0 else 0.0
+    return summary
+
+
 # 异步核心逻辑
-async def async_main(server_path: str, api_key: str, base_url: str, model_name: str):
+async def async_main(server_path: str, api_key: str, base_url: str, model_name: str, settings: Optional[str] = None,
+                     tool_top_k: int = 8, batch: Optional[str] = None, output: Optional[str] = None,
+                     concurrency: int = 4, request_timeout: float = 30, timeout_floor: float = 1.0,
+                     timeout_ceiling: float = 300.0, heartbeat_interval: float = 0.5):
     llm_config = LLMConfig(
         api_key=api_key,
         base_url=base_url,
         model_name=model_name
     )
-    client = MCPClient(llm_config)
+    client = MCPClient(llm_config, request_timeout=request_timeout, tool_top_k=tool_top_k or None,
+                       timeout_floor=timeout_floor, timeout_ceiling=timeout_ceiling,
+                       heartbeat_interval=heartbeat_interval)
     
-    # 连接服务端
-    if not await client.connect(server_path):
+    # 连接服务端：给出配置文件时连接其中的全部服务端
+    if settings:
+        connected = await client.connect_servers(load_server_settings(settings))
+    else:
+        connected = await client.connect(server_path)
+    if not connected:
         return
     
     try:
+        # 批量模式：从JSONL读取查询，结果写入JSONL
+        if batch:
+            output = output or f"{os.path.splitext(batch)[0]}.results.jsonl"
+            summary = await run_batch(client, batch, output, concurrency)
+            click.echo(f"📄 结果已写入 {output}（处理 {summary['processed']} 条，失败 {summary['errors']} 条，"
+                       f"跳过 {summary['skipped']} 条，{summary['queries_per_s']:.2f} 条/秒）")
+            return
+
         while True:
-            # 获取用户输入的查询内容
-            query = input("\n请输入你的查询需求（输入'exit'退出）：")
+            # 获取用户输入的查询内容（在线程中等待输入，不阻塞事件循环中的后台任务）
+            try:
+                query = await asyncio.to_thread(input, "\n请输入你的查询需求（输入'exit'退出）：")
+            except EOFError:
+                click.echo("程序已退出，再见！")
+                break
             
             # 判断是否需要退出循环
             if query.lower() == 'exit':
@@ -319,8 +1031,21 @@ def main():
     @click.option("--api-key", envvar="LLM_API_KEY", default="自己的api key", required=True, help="LLM API密钥")
     @click.option("--base-url", default="自己的base url", help="LLM API基础地址")
     @click.option("--model-name", default="deepseek-chat", help="模型名称")
-    def parse_args(server_path: str, api_key: str, base_url: str, model_name: str):
-        asyncio.run(async_main(server_path, api_key, base_url, model_name))     #异步执行主逻辑
+    @click.option("--settings", default=None, help="服务端配置JSON（demo_cline_mcp_settings.json 格式），连接其中的全部服务端，忽略 SERVER_PATH")
+    @click.option("--tool-top-k", default=8, show_default=True, help="工具数超过该值时只把与查询最相关的前k个工具放入提示词（0表示始终放入全部工具）")
+    @click.option("--batch", default=None, type=click.Path(exists=True, dir_okay=False), help="批量模式：从JSONL文件读取查询（每行 {\"query\": ..., \"id\": ...}），不进入交互")
+    @click.option("--output", default=None, help="批量模式的结果JSONL路径，默认 <输入文件名>.results.jsonl；已有结果时跳过已完成的查询")
+    @click.option("--concurrency", default=4, show_default=True, help="批量模式同时处理的查询数")
+    @click.option("--request-timeout", default=30.0, show_default=True, help="服务端请求超时（秒），工具的耗时样本不足时使用")
+    @click.option("--timeout-floor", default=1.0, show_default=True, help="自适应超时（最近 p99 耗时 × 3）的下限（秒）")
+    @click.option("--timeout-ceiling", default=300.0, show_default=True, help="自适应超时的上限（秒）")
+    @click.option("--heartbeat-interval", default=0.5, show_default=True, help="服务端心跳间隔（秒），连续2次无响应视为卡死并重启；0表示关闭")
+    def parse_args(server_path: str, api_key: str, base_url: str, model_name: str, settings: Optional[str], tool_top_k: int,
+                   batch: Optional[str], output: Optional[str], concurrency: int, request_timeout: float,
+                   timeout_floor: float, timeout_ceiling: float, heartbeat_interval: float):
+        asyncio.run(async_main(server_path, api_key, base_url, model_name, settings, tool_top_k,
+                               batch, output, concurrency, request_timeout, timeout_floor, timeout_ceiling,
+                               heartbeat_interval))     #异步执行主逻辑
     
     parse_args()  #执行异步函数
 
@@ -1,239 +1,578 @@
-import click
 import json
+import os
 import sys
 import asyncio
+import importlib
+import reprlib
 import traceback
-from typing import Dict, Any, Callable
-from pydantic import BaseModel
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Set, Tuple
 import io
 
+from framing import DEFAULT_MAX_MESSAGE_BYTES, FrameDecoder, FrameError, aiter_frames, encode_message, frame_body, message_id, thread_reader
+from tool_runtime import CancelToken, ToolCancelled, accepts_cancel_token, is_coroutine_tool, is_streaming_tool, run_tool, stream_tool
+from typed_results import tool_result
+from shared_arrays import attach_arguments, release
+
 # 确保编码和缓冲正常
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', line_buffering=True)
 
-class Tool(BaseModel):
-    name: str
-    description: str
-    parameters: Dict[str, Any]
-    function: Callable[[Dict[str, Any]], Any]
+# 服务端繁忙（并发请求数已达上限）时返回的错误码，客户端据此退避重试
+SERVER_BUSY_CODE = -32001
+# 单条调试日志的最大长度，避免大负载被完整写入stderr
+DEBUG_LOG_MAX_CHARS = 2000
+# 调试日志中请求、参数和响应的摘要：只展开有限的层级、元素和字符，不序列化完整负载，耗时与负载大小无关
+_DEBUG_REPR = reprlib.Repr()
+_DEBUG_REPR.maxlevel = 4
+_DEBUG_REPR.maxdict = _DEBUG_REPR.maxlist = 20
+_DEBUG_REPR.maxstring = _DEBUG_REPR.maxother = 200
+# 默认的工具清单：工具元数据（名称、描述、参数）写在清单中，实现模块在首次调用时才导入
+DEFAULT_TOOLS_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.json")
+
+# 工具调用入口：(参数, 取消令牌, 请求_meta) -> (结果, 响应附加字段)
+Invoker = Callable[[Dict[str, Any], CancelToken, Dict[str, Any]], Awaitable[Tuple[Any, Dict[str, Any]]]]
+
+class Tool:
+    """
+    已注册的工具。热路径上只做属性读取（__slots__，不经过pydantic，也不重复构建字典）：
+      descriptor/descriptor_json: 注册时生成的工具列表条目及其JSON字节
+      invoke: 绑定实现时生成的调用入口，已确定隔离方式、流式、并发槽位和超时，调用时无需再分支判断
+    启动路径上只使用标准库（冷启动耗时见 python -m bench startup）
+    """
+    __slots__ = ("name", "description", "parameters", "function", "entry", "max_concurrency", "isolation",
+                 "pass_token", "idempotent", "output_schema", "streaming", "descriptor", "descriptor_json", "invoke")
+
+    def __init__(self, name: str, description: str, parameters: Dict[str, Any],
+                 function: Optional[Callable[[Dict[str, Any]], Any]] = None, entry: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, isolation: str = "thread", pass_token: bool = False,
+                 idempotent: bool = False, output_schema: Optional[Dict[str, Any]] = None, streaming: bool = False):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.function = function  # 延迟加载的工具在首次调用前为None
+        self.entry = entry  # "模块:函数"，首次调用时导入
+        self.max_concurrency = max_concurrency  # 该工具同时执行的最大数量，None表示不单独限制
+        self.isolation = isolation  # thread: 线程池执行；process: 子进程执行，超时/取消时可强制终止；async: 事件循环中await
+        self.pass_token = pass_token  # 工具函数是否接收 cancel_token 参数
+        self.idempotent = idempotent  # 重复调用结果相同且无副作用，客户端可在服务端崩溃重启后安全重试
+        self.output_schema = output_schema  # structuredContent 的JSON Schema，在工具列表中以 outputSchema 声明
+        self.streaming = streaming  # 生成器/异步生成器工具，逐块产出结果
+        self.descriptor = self.describe()
+        self.descriptor_json = json.dumps(self.descriptor).encode("utf-8")
+        self.invoke: Optional[Invoker] = None
+
+    def describe(self) -> Dict[str, Any]:
+        description = {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": {
+                "type": "object",
+                "properties": self.parameters["properties"],
+                "required": self.parameters.get("required", [])
+            },
+            "annotations": {"idempotentHint": self.idempotent}
+        }
+        if self.output_schema:
+            description["outputSchema"] = self.output_schema
+        return description
+
+
+def validate_tool_spec(**spec):
+    """可选的注册时校验：延迟导入 pydantic，只在启用校验时付出导入开销"""
+    from typing import Literal
+    from pydantic import BaseModel, PositiveInt, ValidationError
+
+    class ToolSpec(BaseModel):
+        name: str
+        description: str
+        parameters: Dict[str, Any]
+        function: Optional[Callable[..., Any]] = None
+        entry: Optional[str] = None
+        max_concurrency: Optional[PositiveInt] = None
+        isolation: Literal["auto", "thread", "process", "async"] = "auto"
+        idempotent: bool = False
+        output_schema: Optional[Dict[str, Any]] = None
+
+    try:
+        ToolSpec(**spec)
+    except ValidationError as e:
+        raise ValueError(f"工具 '{spec.get('name')}' 的定义无效: {e}")
 
 class MCPServer:
-    def __init__(self, name: str, version: str, timeout: int = 30):
+    def __init__(self, name: str, version: str, timeout: int = 30, max_pending: int = 64,
+                 max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES, validate_tools: bool = False,
+                 max_pending_async: int = 10000):
         self.name = name
         self.version = version
         self.tools: Dict[str, Tool] = {}
         self.running = False
         self.timeout = timeout
+        # 全局请求队列上限：正在处理+等待工具并发槽位的请求总数，超过即快速拒绝
+        self.max_pending = max_pending
+        self.pending: Set[asyncio.Task] = set()
+        # 协程工具（isolation 为 async）的调用单独计数：等待中的协程不占用线程或进程，只占少量内存，
+        # 上限只用于防止内存无限增长，不与线程池/进程池工具共用 max_pending
+        self.max_pending_async = max_pending_async
+        self.pending_async: Set[asyncio.Task] = set()
+        self.tool_slots: Dict[str, asyncio.Semaphore] = {}
+        # 在途请求：请求id -> (处理任务, 取消令牌)，用于响应 notifications/cancelled
+        self.inflight: Dict[Any, Tuple[asyncio.Task, CancelToken]] = {}
+        # 单条消息大小上限；响应沿用客户端最近一条消息的帧格式（每行一个JSON 或 Content-Length）
+        self.decoder = FrameDecoder(max_message_bytes)
+        # 注册工具时是否用 pydantic 校验定义（默认关闭，避免启动时导入 pydantic）
+        self.validate_tools = validate_tools
+        # 工具列表响应及其JSON字节，注册工具后重新生成
+        self._tool_list: Optional[List[Dict[str, Any]]] = None
+        self._tool_list_json: Optional[bytes] = None
+        # 请求类型 -> 处理方法
+        self._handlers = {"list_tools": self._handle_list_tools, "call_tool": self._handle_call_tool}
         # 调试日志开关
         self.debug = True
 
     def debug_log(self, message: str):
         if self.debug:
+            if len(message) > DEBUG_LOG_MAX_CHARS:
+                message = f"{message[:DEBUG_LOG_MAX_CHARS]}...（共{len(message)}字符）"
             # 用err输出日志（避免与正常响应混在一起）
-            click.echo(f"[DEBUG] {message}", err=True)
+            print(f"[DEBUG] {message}", file=sys.stderr)
 
-    def add_tool(self, name: str, description: str, parameters: Dict[str, Any], function: Callable[[Dict[str, Any]], Any]):
-        self.tools[name] = Tool(
+    def add_tool(self, name: str, description: str, parameters: Dict[str, Any],
+                 function: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 max_concurrency: Optional[int] = None, isolation: str = "auto", idempotent: bool = False,
+                 output_schema: Optional[Dict[str, Any]] = None, entry: Optional[str] = None):
+        """
+        isolation: auto 时，声明了 cancel_token 参数的工具在线程中执行（可协作取消），
+        否则放到子进程中执行，保证超时或取消后能被强制终止
+        协程函数（async def）工具直接在事件循环中 await（isolation 为 async），不占用线程池，适合I/O密集的工具
+        生成器/异步生成器工具为流式工具：每个分块之间都会检查取消，只能在线程（异步生成器在事件循环）中执行
+        entry: 不直接给出 function 时，以 "模块:函数" 指定实现，首次调用时才导入（工具列表不需要导入实现）
+        """
+        if self.validate_tools:
+            validate_tool_spec(name=name, description=description, parameters=parameters, function=function,
+                               entry=entry, max_concurrency=max_concurrency, isolation=isolation,
+                               idempotent=idempotent, output_schema=output_schema)
+        if function is None and not entry:
+            raise ValueError(f"工具 '{name}' 缺少 function 或 entry")
+        if isolation not in ("auto", "thread", "process", "async"):
+            raise ValueError(f"不支持的隔离方式: {isolation}")
+        tool = Tool(
             name=name,
             description=description,
             parameters=parameters,
-            function=function
+            entry=entry,
+            max_concurrency=max_concurrency,
+            isolation=isolation,
+            idempotent=idempotent,
+            output_schema=output_schema
         )
+        if max_concurrency:
+            self.tool_slots[name] = asyncio.Semaphore(max_concurrency)
+        else:
+            self.tool_slots.pop(name, None)
+        if function is not None:
+            self._bind_function(tool, function)
+        else:
+            tool.invoke = self._make_loader(tool)
+        self.tools[name] = tool
+        self._tool_list = self._tool_list_json = None
+
+    def _bind_function(self, tool: Tool, function: Callable[[Dict[str, Any]], Any]):
+        """根据函数签名确定取消令牌、流式和隔离方式"""
+        pass_token = accepts_cancel_token(function)
+        streaming = is_streaming_tool(function)
+        coroutine = is_coroutine_tool(function)
+        isolation = tool.isolation
+        if streaming and isolation == "process":
+            raise ValueError(f"流式工具 '{tool.name}' 不支持进程隔离")
+        if coroutine:
+            # 协程不能在线程池或子进程中执行，清单中声明的 thread/auto 也改为在事件循环中执行
+            if isolation == "process":
+                raise ValueError(f"协程工具 '{tool.name}' 不支持进程隔离")
+            isolation = "async"
+        elif isolation == "async":
+            raise ValueError(f"工具 '{tool.name}' 不是协程函数，不能使用 async 隔离方式")
+        elif isolation == "auto":
+            isolation = "thread" if pass_token or streaming else "process"
+        tool.function = function
+        tool.pass_token = pass_token
+        tool.streaming = streaming
+        tool.isolation = isolation
+        tool.invoke = self._make_invoker(tool)
+
+    def _make_invoker(self, tool: Tool) -> Invoker:
+        """按工具的执行方式生成调用入口，把每次调用都要做的判断提前到注册时"""
+        if tool.streaming:
+            async def invoke_stream(args, token, meta):
+                return await self._stream_tool(tool, args, token, meta)
+            return invoke_stream
+
+        function, isolation, pass_token, timeout = tool.function, tool.isolation, tool.pass_token, self.timeout
+        slots = self.tool_slots.get(tool.name)
+        if slots is None:
+            async def invoke(args, token, meta):
+                return await asyncio.wait_for(run_tool(function, args, token, isolation, pass_token), timeout=timeout), {}
+            return invoke
+
+        async def run_with_slot(args, token):
+            async with slots:
+                token.raise_if_cancelled()
+                return await run_tool(function, args, token, isolation, pass_token)
+
+        async def invoke_limited(args, token, meta):
+            # 等待工具并发槽位的时间也计入超时
+            return await asyncio.wait_for(run_with_slot(args, token), timeout=timeout), {}
+        return invoke_limited
 
-    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        self.debug_log(f"开始处理请求: {json.dumps(request)}")  # 记录收到的请求
+    def _make_loader(self, tool: Tool) -> Invoker:
+        """延迟加载工具的首次调用入口：导入实现并替换为正式的调用入口"""
+        async def load_and_invoke(args, token, meta):
+            await self._load_tool(tool)
+            return await tool.invoke(args, token, meta)
+        return load_and_invoke
+
+    async def _load_tool(self, tool: Tool):
+        """延迟加载：首次调用时在线程中导入实现模块，不阻塞事件循环"""
+        if tool.function is not None:
+            return
+        module_name, _, attribute = tool.entry.partition(":")
+        try:
+            module = await asyncio.to_thread(importlib.import_module, module_name)
+            function = getattr(module, attribute)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"加载工具 '{tool.name}' 的实现 {tool.entry} 失败: {str(e)}")
+        if tool.function is None:
+            self._bind_function(tool, function)
+            self.debug_log(f"已加载工具 {tool.name} 的实现 {tool.entry}")
+
+    def load_tools(self, path: str):
+        """
+        从JSON清单注册工具，只读取元数据，不导入实现：
+          {"schemas": {"名称": {...}},
+           "tools": [{"name", "description", "entry": "模块:函数", "parameters", "output_schema",
+                      "isolation", "idempotent", "max_concurrency"}]}
+        parameters/output_schema 可以直接写Schema，也可以写 schemas 中的名称以共用定义
+        """
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 清单所在目录加入模块搜索路径，插件模块可以与清单放在一起
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in sys.path:
+            sys.path.append(directory)
+        schemas = manifest.get("schemas", {})
+
+        def schema(value):
+            if isinstance(value, str):
+                if value not in schemas:
+                    raise ValueError(f"工具清单 {path} 中未定义Schema: {value}")
+                return schemas[value]
+            return value
+
+        for spec in manifest.get("tools", []):
+            self.add_tool(
+                name=spec["name"],
+                description=spec.get("description", ""),
+                parameters=schema(spec.get("parameters") or {"properties": {}}),
+                entry=spec["entry"],
+                max_concurrency=spec.get("max_concurrency"),
+                isolation=spec.get("isolation", "auto"),
+                idempotent=spec.get("idempotent", False),
+                output_schema=schema(spec.get("output_schema"))
+            )
+
+    async def handle_request(self, request: Dict[str, Any], token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        if self.debug:
+            self.debug_log(f"开始处理请求: {_DEBUG_REPR.repr(request)}")  # 记录收到的请求（摘要）
         try:
-            if request.get("type") == "list_tools":
-                self.debug_log("处理工具列表请求")
-                response = {
-                    "type": "tool_list",
-                    "tools": [
-                        {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": tool.parameters["properties"],
-                                "required": tool.parameters.get("required", [])
-                            }
-                        } for tool in self.tools.values()
-                    ]
-                }
-                self.debug_log(f"工具列表响应: {json.dumps(response)}")
-                return response
-
-            elif request.get("type") == "call_tool":
-                tool_name = request.get("name")
-                args = request.get("arguments", {})
-                self.debug_log(f"处理工具调用: {tool_name}, 参数: {json.dumps(args)}")
-
-                if not tool_name or tool_name not in self.tools:
-                    error = {"type": "error", "message": f"工具 '{tool_name}' 不存在"}
-                    self.debug_log(f"错误响应: {json.dumps(error)}")
-                    return error
-
-                tool = self.tools[tool_name]
-                try:
-                    loop = asyncio.get_event_loop()
-                    self.debug_log(f"执行工具 {tool_name} (超时时间: {self.timeout}秒)")
-                    result = await asyncio.wait_for(
-                        loop.run_in_executor(None, tool.function, args),
-                        timeout=self.timeout
-                    )
-                    response = {
-                        "type": "tool_response",
-                        "name": tool_name,
-                        "content": [{"text": str(result)}]
-                    }
-                    self.debug_log(f"工具调用成功，结果: {json.dumps(response)}")
-                    return response
-                except asyncio.TimeoutError:
-                    error = {"type": "error", "message": f"工具 '{tool_name}' 调用超时"}
-                    self.debug_log(f"错误响应: {json.dumps(error)}")
-                    return error
-                except Exception as e:
-                    error = {"type": "error", "message": f"工具调用失败: {str(e)}"}
-                    self.debug_log(f"错误响应: {json.dumps(error)} | 详情: {traceback.format_exc()}")
-                    return error
-
-            else:
+            handler = self._handlers.get(request.get("type"))
+            if handler is None:
                 error = {"type": "error", "message": f"不支持的请求类型: {request.get('type')}"}
                 self.debug_log(f"错误响应: {json.dumps(error)}")
                 return error
+            return await handler(request, token)
 
         except Exception as e:
             error = {"type": "error", "message": f"处理请求失败: {str(e)}"}
             self.debug_log(f"错误响应: {json.dumps(error)} | 详情: {traceback.format_exc()}")
             return error
 
+    async def _handle_list_tools(self, request: Dict[str, Any], token: Optional[CancelToken]) -> Dict[str, Any]:
+        self.debug_log("处理工具列表请求")
+        if self._tool_list is None:
+            self._tool_list = [tool.descriptor for tool in self.tools.values()]
+            self._tool_list_json = b"[" + b", ".join(tool.descriptor_json for tool in self.tools.values()) + b"]"
+        # 工具列表在注册后不再变化，发送时直接使用预先生成的JSON字节（见 encode_response）
+        return {"type": "tool_list", "tools": self._tool_list}
+
+    async def _handle_call_tool(self, request: Dict[str, Any], token: Optional[CancelToken]) -> Dict[str, Any]:
+        tool_name = request.get("name")
+        args = request.get("arguments", {})
+        if self.debug:
+            self.debug_log(f"处理工具调用: {tool_name}, 参数: {_DEBUG_REPR.repr(args)}")
+
+        tool = self.tools.get(tool_name) if tool_name else None
+        if tool is None:
+            error = {"type": "error", "message": f"工具 '{tool_name}' 不存在"}
+            self.debug_log(f"错误响应: {json.dumps(error)}")
+            return error
+
+        token = token or CancelToken()
+        segments = []
+        try:
+            # 共享内存数组句柄替换为不复制的数组视图，调用结束后解除映射
+            args, segments = attach_arguments(args)
+            self.debug_log(f"执行工具 {tool_name} (超时时间: {self.timeout}秒)")
+            result, extra = await tool.invoke(args, token, request.get("_meta") or {})
+            # structuredContent 为带类型的结果，content 为其紧凑文本渲染
+            response = {
+                "type": "tool_response",
+                "name": tool_name,
+                **tool_result(result),
+                **extra
+            }
+            if self.debug:
+                self.debug_log(f"工具调用成功，结果: {_DEBUG_REPR.repr(response)}")
+            return response
+        except asyncio.TimeoutError:
+            token.cancel("timeout")
+            if tool.isolation == "thread" and not tool.pass_token and not tool.streaming:
+                self.debug_log(f"警告: 工具 {tool_name} 不支持取消，超时后仍会在后台线程中运行至结束")
+            error = {"type": "error", "message": f"工具 '{tool_name}' 调用超时"}
+            self.debug_log(f"错误响应: {json.dumps(error)}")
+            return error
+        except ToolCancelled as e:
+            error = {"type": "error", "message": f"工具 '{tool_name}' 已取消: {str(e)}"}
+            self.debug_log(f"错误响应: {json.dumps(error)}")
+            return error
+        except Exception as e:
+            error = {"type": "error", "message": f"工具调用失败: {str(e)}"}
+            self.debug_log(f"错误响应: {json.dumps(error)} | 详情: {traceback.format_exc()}")
+            return error
+        finally:
+            if segments:
+                args = None  # 先放开视图引用，共享内存才能解除映射
+                release(segments)
+
+    async def _stream_tool(self, tool: Tool, args: Dict[str, Any], token: CancelToken,
+                           meta: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        """
+        执行流式工具，超时时间限制相邻分块之间的间隔。请求带 _meta.progressToken 时，
+        每个分块立即以 notifications/progress 发送且不在服务端保留，最终结果为生成器的返回值；
+        否则收集全部分块作为结果返回（兼容不支持流式的客户端），生成器有返回值时结果为 {"chunks": [...], "result": 返回值}
+        """
+        progress_token = meta.get("progressToken")
+        chunks = []
+        count = 0
+
+        def on_chunk(chunk: Any):
+            nonlocal count
+            count += 1
+            if progress_token is None:
+                chunks.append(chunk)
+                return
+            self.send_response({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"progressToken": progress_token, "progress": count, **tool_result(chunk)}
+            })
+
+        async def run():
+            return await stream_tool(tool.function, args, token, on_chunk, tool.pass_token, idle_timeout=self.timeout)
+
+        slots = self.tool_slots.get(tool.name)
+        if slots is None:
+            value = await run()
+        else:
+            await asyncio.wait_for(slots.acquire(), timeout=self.timeout)
+            try:
+                token.raise_if_cancelled()
+                value = await run()
+            finally:
+                slots.release()
+
+        if progress_token is not None:
+            return value, {"progress": count}
+        if value is None:
+            return chunks, {}
+        return {"chunks": chunks, "result": value}, {}
+
+    def encode_response(self, response: Dict[str, Any]) -> bytes:
+        """序列化并分帧；工具列表响应只拼接预先生成的工具列表JSON和请求id"""
+        if self._tool_list is not None and response.get("tools") is self._tool_list:
+            body = b'{"type": "tool_list", "tools": ' + self._tool_list_json
+            if "id" in response:
+                body += b', "id": ' + json.dumps(response["id"]).encode("utf-8")
+            return frame_body(body + b"}", self.decoder.framing)
+        return encode_message(response, self.decoder.framing)
+
+    def send_response(self, response: Dict[str, Any]):
+        data = self.encode_response(response)
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        self.debug_log(f"已发送响应: {len(data)}字节")
+
+    async def process_request(self, request: Dict[str, Any]):
+        request_id = request.get("id") if isinstance(request, dict) else None
+        token = CancelToken()
+        if request_id is not None:
+            self.inflight[request_id] = (asyncio.current_task(), token)
+        try:
+            response = await self.handle_request(request, token)
+        except asyncio.CancelledError:
+            # 已被客户端取消的请求不再发送响应
+            self.debug_log(f"请求 {request_id} 已取消: {token.reason}")
+            return
+        finally:
+            self.inflight.pop(request_id, None)
+        # 并发处理时响应可能乱序，回显请求id供客户端匹配
+        if request_id is not None:
+            response["id"] = request_id
+        self.send_response(response)
+
+    def cancel_request(self, params: Dict[str, Any]):
+        """处理 notifications/cancelled：设置取消令牌并取消处理任务（进程隔离的工具会被终止）"""
+        request_id = params.get("requestId")
+        entry = self.inflight.get(request_id)
+        if entry is None:
+            self.debug_log(f"忽略取消通知，请求 {request_id} 不存在或已完成")
+            return
+        task, token = entry
+        token.cancel(params.get("reason") or "客户端取消")
+        task.cancel()
+
+    def pong(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """心跳响应：{"type": "ping"} 回复 {"type": "pong"}，JSON-RPC 的 ping 方法回复空结果"""
+        if request.get("method") == "ping":
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": {}}
+        response = {"type": "pong"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def unparsed_error(self, message: str, data: bytes) -> Dict[str, Any]:
+        """无法解析的消息的错误响应：能从消息开头恢复请求id时回显id，否则不带id（客户端不会猜测它对应哪个请求）"""
+        error = {"type": "error", "message": message}
+        request_id = message_id(data)
+        if request_id is not None:
+            error["id"] = request_id
+        return error
+
+    def admit_request(self, request: Dict[str, Any]):
+        """准入控制：队列未满则创建处理任务，已满则立即返回繁忙错误；协程工具的调用使用单独的队列"""
+        tool = self.tools.get(request.get("name")) if isinstance(request, dict) and request.get("type") == "call_tool" else None
+        if tool is not None and tool.isolation == "async":
+            pending, limit = self.pending_async, self.max_pending_async
+        else:
+            pending, limit = self.pending, self.max_pending
+        if len(pending) >= limit:
+            error = {
+                "type": "error",
+                "code": SERVER_BUSY_CODE,
+                "message": f"服务端繁忙（处理中的请求已达上限 {limit}），请稍后重试"
+            }
+            if isinstance(request, dict) and "id" in request:
+                error["id"] = request["id"]
+            self.send_response(error)
+            return
+        task = asyncio.create_task(self.process_request(request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
     async def start_stdio(self):
         self.running = True
         self.debug_log(f"服务端 '{self.name}' v{self.version} 启动成功（stdio模式），超时时间: {self.timeout}秒")
 
-        while self.running:
+        # 在专用线程中直接读文件描述符：读取线程阻塞时不持有 sys.stdin 缓冲区的锁，
+        # 否则 fork 出的工具子进程启动时关闭 sys.stdin 会因该锁永久阻塞；
+        # 也不占用线程工具使用的默认线程池，线程池占满时仍能及时应答心跳和取消通知
+        # 按块读取stdin并增量分帧，支持任意大小（不超过上限）的消息
+        frames = aiter_frames(thread_reader(sys.stdin.fileno()), self.decoder)
+        async for body, frame_error in frames:
             try:
-                self.debug_log("等待客户端输入...")
-                # 读取客户端请求
-                line = await asyncio.wait_for(
-                    asyncio.to_thread(sys.stdin.readline),
-                    timeout=None  # 等待请求时不超时
-                )
-                
-                if not line:
-                    self.debug_log("未收到输入，退出循环")
-                    break
-                line = line.strip()
-                if not line:
-                    self.debug_log("收到空输入，继续等待")
+                if frame_error is not None:
+                    raise frame_error
+                self.debug_log(f"收到原始输入: {len(body)}字节")
+                request = json.loads(body)
+                # 合法JSON但不是对象（如数组、字符串）时直接返回错误，不创建处理任务
+                if not isinstance(request, dict):
+                    self.send_response({"type": "error", "message": "无效的请求: 消息必须是JSON对象"})
+                    continue
+                # 取消通知不占用请求队列，保证过载时也能及时取消
+                if request.get("method") == "notifications/cancelled":
+                    self.cancel_request(request.get("params") or {})
                     continue
+                # 心跳直接在读取循环中应答，同样不占用请求队列：过载时仍能表明服务端没有卡死
+                if request.get("type") == "ping" or request.get("method") == "ping":
+                    self.send_response(self.pong(request))
+                    continue
+                # 不等待处理完成，继续读取下一条请求
+                self.admit_request(request)
 
-                self.debug_log(f"收到原始输入: {line}")
-                request = json.loads(line)
-                response = await self.handle_request(request)
-                # 发送响应
-                response_str = json.dumps(response)
-                print(response_str)
-                sys.stdout.flush()
-                self.debug_log(f"已发送响应: {response_str}")
-                
             except json.JSONDecodeError as e:
-                error = {"type": "error", "message": f"无效的JSON格式: {str(e)}"}
-                error_str = json.dumps(error)
-                print(error_str)
-                sys.stdout.flush()
-                self.debug_log(f"JSON解析错误: {error_str} | 输入内容: {line}")
-            except asyncio.TimeoutError:
-                error = {"type": "error", "message": "读取请求超时"}
-                error_str = json.dumps(error)
-                print(error_str)
-                sys.stdout.flush()
-                self.debug_log(f"读取请求超时: {error_str}")
+                error = self.unparsed_error(f"无效的JSON格式: {str(e)}", body)
+                self.send_response(error)
+                self.debug_log(f"JSON解析错误: {json.dumps(error)} | 输入内容: {body[:200]!r}")
+            except ValueError as e:
+                error = self.unparsed_error(f"无效的消息: {str(e)}", e.prefix if isinstance(e, FrameError) else b"")
+                self.send_response(error)
+                self.debug_log(f"消息分帧错误: {json.dumps(error)}")
             except Exception as e:
                 error = {"type": "error", "message": f"处理请求出错: {str(e)}"}
-                error_str = json.dumps(error)
-                print(error_str)
-                sys.stdout.flush()
-                self.debug_log(f"处理请求异常: {error_str} | 详情: {traceback.format_exc()}")
+                self.send_response(error)
+                self.debug_log(f"处理请求异常: {json.dumps(error)} | 详情: {traceback.format_exc()}")
+            if not self.running:
+                break
+        self.debug_log("输入结束，退出循环")
+
+        # 输入结束后等待在途请求处理完毕再退出
+        if self.pending or self.pending_async:
+            await asyncio.gather(*self.pending, *self.pending_async, return_exceptions=True)
 
     def stop(self):
         self.running = False
 
 
-# 工具实现（保持不变）
-def addition(args: Dict[str, Any]) -> float:
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a + b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
-
-def subtraction(args: Dict[str, Any]) -> float:
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a - b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
-
-def multiplication(args: Dict[str, Any]) -> float:
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        return a * b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
+def serve(timeout: int = 30, max_pending: int = 64, max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES,
+          tools_manifests: Tuple[str, ...] = (), validate_tools: bool = False, max_pending_async: int = 10000):
+    server = MCPServer(name="calculator", version="1.0.0", timeout=timeout, max_pending=max_pending,
+                       max_message_bytes=max_message_bytes, validate_tools=validate_tools,
+                       max_pending_async=max_pending_async)
 
-def division(args: Dict[str, Any]) -> float:
-    try:
-        a = float(args.get("a"))
-        b = float(args.get("b"))
-        if b == 0:
-            raise ValueError("除数不能为0")
-        return a / b
-    except (TypeError, ValueError) as e:
-        raise ValueError(f"无效的输入参数: {str(e)}")
-
-
-@click.command()
-@click.option("--timeout", default=30, help="工具调用超时时间（秒）")
-def main(timeout):
-    server = MCPServer(name="calculator", version="1.0.0", timeout=timeout)
-
-    # 注册工具（保持不变）
-    server.add_tool(
-        name="addition",
-        description="计算两个数字的和，如果遇到计算两个数字的和的问题，请优先使用此函数",
-        parameters={"properties": {"a": {"type": "number"}, "b": {"type": "number"}}, "required": ["a", "b"]},
-        function=addition
-    )
-    server.add_tool(
-        name="subtraction",
-        description="计算两个数字的差",
-        parameters={"properties": {"a": {"type": "number"}, "b": {"type": "number"}}, "required": ["a", "b"]},
-        function=subtraction
-    )
-    server.add_tool(
-        name="multiplication",
-        description="计算两个数字的积",
-        parameters={"properties": {"a": {"type": "number"}, "b": {"type": "number"}}, "required": ["a", "b"]},
-        function=multiplication
-    )
-    server.add_tool(
-        name="division",
-        description="计算两个数字的商",
-        parameters={"properties": {"a": {"type": "number"}, "b": {"type": "number"}}, "required": ["a", "b"]},
-        function=division
-    )
+    # 从工具清单注册工具（默认 tools.json），实现模块在首次调用时才导入
+    for path in tools_manifests or (DEFAULT_TOOLS_MANIFEST,):
+        server.load_tools(path)
 
     try:
         asyncio.run(server.start_stdio())
     except KeyboardInterrupt:
-        click.echo("\n⏹️ 服务端已停止", err=True)
+        print("\n⏹️ 服务端已停止", file=sys.stderr)
     except Exception as e:
-        click.echo(f"❌ 服务端错误: {str(e)}\n{traceback.format_exc()}", err=True)
+        print(f"❌ 服务端错误: {str(e)}\n{traceback.format_exc()}", file=sys.stderr)
+
+
+def cli():
+    # 延迟导入：click 导入约需30ms，只有需要解析命令行参数时才导入
+    import click
+
+    @click.command()
+    @click.option("--timeout", default=30, help="工具调用超时时间（秒）")
+    @click.option("--max-pending", default=64, help="同时处理的最大请求数，超过时返回服务端繁忙错误")
+    @click.option("--max-pending-async", default=10000, help="同时处理的协程工具调用的最大数量（不计入 --max-pending）")
+    @click.option("--max-message-bytes", default=DEFAULT_MAX_MESSAGE_BYTES, help="单条消息的最大字节数，超过时丢弃该消息并返回错误")
+    @click.option("--tools", "tools_manifests", multiple=True, help="工具清单JSON路径（可重复），默认 tools.json")
+    @click.option("--validate-tools", is_flag=True, help="注册工具时用 pydantic 校验工具定义")
+    def command(timeout, max_pending, max_pending_async, max_message_bytes, tools_manifests, validate_tools):
+        serve(timeout, max_pending, max_message_bytes, tools_manifests, validate_tools, max_pending_async)
+
+    command()
+
+
+def main():
+    """快速启动：不带命令行参数时（MCP宿主按需启动的常见方式）直接使用默认配置，不导入 click"""
+    if len(sys.argv) > 1:
+        cli()
+    else:
+        serve()
 
 
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
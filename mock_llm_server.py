@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+本地 OpenAI 兼容 LLM 桩服务（基于 aiohttp）
+用于在无网络、无真实大模型的情况下测试和压测 MCPClient：
+  - 响应可通过JSON脚本配置：按正则匹配最后一条消息，返回文本或 tool_calls JSON
+  - 可配置固定延迟和随机抖动，模拟真实模型耗时
+
+脚本格式示例：
+{
+  "latency_ms": 20,
+  "jitter_ms": 5,
+  "rules": [
+    {"system": "模型连接成功", "content": "模型连接成功"},
+    {"match": "(\\\\d+)加(\\\\d+)", "tool_calls": [{"tool_name": "addition", "parameters": {"a": "$1", "b": "$2"}}]},
+    {"role": "tool", "content": "计算结果是 {last}", "latency_ms": 5}
+  ],
+  "default": {"content": "{last}"}
+}
+规则字段：
+  role      最后一条消息的角色，默认 user
+  match     对最后一条消息内容的正则（search），捕获组可在 content 中以 {1}、{2} 引用，在 tool_calls 参数中以 "$1" 引用
+  system    要求系统提示词包含的子串
+  content   返回的文本模板，{last} 为最后一条消息内容
+  tool_calls 返回的工具调用列表，渲染为 ```json 代码块，与 MCPClient 的解析格式一致
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+import click
+from aiohttp import web
+
+# 内置脚本：覆盖连接测试、四则运算工具调用和工具结果总结
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "rules": [
+        {"system": "模型连接成功", "content": "模型连接成功"},
+        {"role": "tool", "content": "计算结果是 {last}"},
+        {"match": r"(-?\d+(?:\.\d+)?)\s*(?:加上?|\+)\s*(-?\d+(?:\.\d+)?)",
+         "tool_calls": [{"tool_name": "addition", "parameters": {"a": "$1", "b": "$2"}}]},
+        {"match": r"(-?\d+(?:\.\d+)?)\s*(?:减去?|-)\s*(-?\d+(?:\.\d+)?)",
+         "tool_calls": [{"tool_name": "subtraction", "parameters": {"a": "$1", "b": "$2"}}]},
+        {"match": r"(-?\d+(?:\.\d+)?)\s*(?:乘以?|\*|×)\s*(-?\d+(?:\.\d+)?)",
+         "tool_calls": [{"tool_name": "multiplication", "parameters": {"a": "$1", "b": "$2"}}]},
+        {"match": r"(-?\d+(?:\.\d+)?)\s*(?:除以|/|÷)\s*(-?\d+(?:\.\d+)?)",
+         "tool_calls": [{"tool_name": "division", "parameters": {"a": "$1", "b": "$2"}}]},
+    ],
+    "default": {"content": "我无法回答这个问题：{last}"},
+}
+
+
+def _substitute(value: Any, groups: List[str]) -> Any:
+    """把 tool_calls 参数中的 "$N" 替换为正则捕获组，数字字符串转换为数值"""
+    if isinstance(value, dict):
+        return {k: _substitute(v, groups) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, groups) for v in value]
+    if isinstance(value, str):
+        matched = re.fullmatch(r"\$(\d+)", value)
+        if matched:
+            index = int(matched.group(1))
+            text = groups[index] if index < len(groups) else ""
+            try:
+                return int(text)
+            except ValueError:
+                try:
+                    return float(text)
+                except ValueError:
+                    return text
+    return value
+
+
+class MockLLM:
+    """按脚本生成回复的模型桩"""
+
+    def __init__(self, script: Optional[Dict[str, Any]] = None):
+        self.script = script or DEFAULT_SCRIPT
+        self.rules = []
+        for rule in self.script.get("rules", []):
+            compiled = dict(rule)
+            compiled["_pattern"] = re.compile(rule["match"]) if rule.get("match") else None
+            self.rules.append(compiled)
+        self.requests = 0  # 已处理的请求数
+
+    def _latency(self, rule: Dict[str, Any]) -> float:
+        latency = rule.get("latency_ms", self.script.get("latency_ms", 0))
+        jitter = rule.get("jitter_ms", self.script.get("jitter_ms", 0))
+        if jitter:
+            latency += random.uniform(-jitter, jitter)
+        return max(latency, 0) / 1000.0
+
+    def reply(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """返回 {"content": 文本, "delay": 秒}"""
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+        last_role = last.get("role", "user")
+        last_content = last.get("content") or ""
+        system = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+
+        for rule in self.rules:
+            if rule.get("role", "user") != last_role and not rule.get("system"):
+                continue
+            if rule.get("system") and rule["system"] not in system:
+                continue
+            groups = [last_content]
+            if rule["_pattern"] is not None:
+                matched = rule["_pattern"].search(last_content)
+                if not matched:
+                    continue
+                groups = [matched.group(0)] + [g or "" for g in matched.groups()]
+            return {"content": self._render(rule, groups, last_content), "delay": self._latency(rule)}
+
+        default = self.script.get("default", {"content": "{last}"})
+        return {"content": self._render(default, [last_content], last_content), "delay": self._latency(default)}
+
+    def _render(self, rule: Dict[str, Any], groups: List[str], last: str) -> str:
+        if "tool_calls" in rule:
+            calls = _substitute(rule["tool_calls"], groups)
+            return "```json\n" + json.dumps({"tool_calls": calls}, ensure_ascii=False) + "\n```"
+        template = rule.get("content", "")
+        values = {str(i): g for i, g in enumerate(groups)}
+        return re.sub(r"\{(\w+)\}", lambda m: last if m.group(1) == "last" else values.get(m.group(1), m.group(0)), template)
+
+
+class MockLLMServer:
+    """在当前事件循环中运行的 OpenAI 兼容 HTTP 服务"""
+
+    def __init__(self, script: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.llm = MockLLM(script)
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.handle_chat)
+        app.router.add_post("/v1/chat/completions", self.handle_chat)
+        app.router.add_get("/models", self.handle_models)
+        return app
+
+    async def handle_chat(self, request: web.Request) -> web.Response:
+        try:
+            payload = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": {"message": "无效的JSON请求体"}}, status=400)
+
+        messages = payload.get("messages") or []
+        self.llm.requests += 1
+        reply = self.llm.reply(messages)
+        if reply["delay"]:
+            await asyncio.sleep(reply["delay"])
+
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply["content"]},
+                "finish_reason": "stop",
+            }],
+            # 粗略按字符数估算，仅用于观察提示词规模
+            "usage": {
+                "prompt_tokens": prompt_chars,
+                "completion_tokens": len(reply["content"]),
+                "total_tokens": prompt_chars + len(reply["content"]),
+            },
+        })
+
+    async def handle_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+
+    async def start(self) -> str:
+        self.runner = web.AppRunner(self.build_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # port=0 时由系统分配端口，取回实际端口
+        self.port = self.runner.addresses[0][1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+def load_script(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@click.command()
+@click.option("--script", "script_path", default=None, help="响应脚本JSON路径，默认使用内置计算器脚本")
+@click.option("--host", default="127.0.0.1", help="监听地址")
+@click.option("--port", default=8765, help="监听端口")
+@click.option("--latency-ms", default=None, type=float, help="覆盖脚本中的全局延迟（毫秒）")
+def main(script_path, host, port, latency_ms):
+    script = dict(load_script(script_path))
+    if latency_ms is not None:
+        script["latency_ms"] = latency_ms
+    server = MockLLMServer(script, host, port)
+
+    async def serve():
+        base_url = await server.start()
+        click.echo(f"✅ Mock LLM 已启动: {base_url} （客户端使用 --base-url {base_url}）", err=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        click.echo("\n⏹️ Mock LLM 已停止", err=True)
+
+
+if __name__ == "__main__":
+    main()
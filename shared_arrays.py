@@ -0,0 +1,199 @@
+"""
+共享内存数组：同一台机器上的客户端和服务端之间传递大型数值数组，不经过JSON
+  - 客户端用 SharedArrays 把数组放进 multiprocessing.shared_memory，工具参数中只传句柄：
+        {"type": "shared_array", "name": "psm_xxx", "dtype": "float64", "shape": [1000000]}
+  - 服务端调用工具前用 attach_arguments 把顶层参数中的句柄替换为共享内存上的视图（不复制）：
+    安装了 NumPy 时为 numpy.ndarray，否则为按 dtype/shape cast 的 memoryview
+  - 共享内存由创建它的客户端负责释放（SharedArrays.close），服务端只映射和解除映射
+numpy 和 multiprocessing.shared_memory 都在首次使用时才导入，不影响服务端冷启动
+"""
+
+import struct
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+SHARED_ARRAY = "shared_array"
+
+# dtype 名称（与 NumPy 一致） -> struct 格式字符（memoryview.cast 使用）
+DTYPES: Dict[str, str] = {
+    "float64": "d",
+    "float32": "f",
+    "int64": "q",
+    "int32": "i",
+    "int16": "h",
+    "int8": "b",
+    "uint64": "Q",
+    "uint32": "I",
+    "uint16": "H",
+    "uint8": "B",
+}
+_FORMATS = {fmt: name for name, fmt in DTYPES.items()}
+
+_numpy = None  # None: 尚未尝试导入；False: 未安装
+# 仍有视图引用、暂时无法解除映射的共享内存，下次释放时重试（避免回收时 SharedMemory.__del__ 报错）
+_lingering: List[Any] = []
+
+
+def _load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _shared_memory():
+    from multiprocessing import shared_memory
+    return shared_memory
+
+
+def is_shared_array(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("type") == SHARED_ARRAY and "name" in value
+
+
+def _item_count(shape: Sequence[int]) -> int:
+    count = 1
+    for size in shape:
+        count *= size
+    return count
+
+
+def _itemsize(fmt: str) -> int:
+    return struct.calcsize(fmt)
+
+
+class SharedArrays:
+    """
+    客户端持有的一组共享内存数组，用法：
+        with SharedArrays() as arrays:
+            await client.call_tool("statistics", {"values": arrays.share(values)})
+    退出时释放全部共享内存；在工具调用返回之前不能释放
+    """
+
+    def __init__(self):
+        self._segments: List[Any] = []
+
+    def create(self, shape: Sequence[int], dtype: str = "float64") -> Tuple[Dict[str, Any], memoryview]:
+        """分配共享内存数组，返回 (句柄, 可写入的memoryview)，调用方直接在共享内存上填充数据，不需要额外复制"""
+        if dtype not in DTYPES:
+            raise ValueError(f"不支持的 dtype: {dtype}（可选: {', '.join(DTYPES)}）")
+        shape = [int(size) for size in shape]
+        fmt = DTYPES[dtype]
+        nbytes = _item_count(shape) * _itemsize(fmt)
+        segment = _shared_memory().SharedMemory(create=True, size=max(nbytes, 1))
+        self._segments.append(segment)
+        handle = {"type": SHARED_ARRAY, "name": segment.name, "dtype": dtype, "shape": shape}
+        return handle, segment.buf[:nbytes].cast(fmt, shape)
+
+    def share(self, values: Any, dtype: Optional[str] = None) -> Dict[str, Any]:
+        """
+        把数组复制进共享内存并返回句柄。values 可以是 numpy.ndarray、array.array、
+        其他支持缓冲区协议的对象，或数字列表（按 dtype 转换，默认 float64）
+        """
+        numpy = _load_numpy()
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            source = numpy.ascontiguousarray(values, dtype=dtype) if dtype else numpy.ascontiguousarray(values)
+            if source.dtype.name not in DTYPES:
+                raise ValueError(f"不支持的 dtype: {source.dtype.name}")
+            handle, view = self.create(source.shape, source.dtype.name)
+            numpy.frombuffer(view, dtype=source.dtype).reshape(source.shape)[...] = source
+            return handle
+
+        try:
+            source = memoryview(values)
+        except TypeError:
+            import array
+            source = memoryview(array.array(DTYPES[dtype or "float64"], values))
+        if source.format not in _FORMATS:
+            raise ValueError(f"不支持的数组元素格式: {source.format}")
+        handle, view = self.create(source.shape, _FORMATS[source.format])
+        view.cast("B")[:] = source.cast("B") if source.contiguous else memoryview(source.tobytes())
+        return handle
+
+    def close(self) -> None:
+        for segment in self._segments:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        release(self._segments)
+        self._segments = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _attach_segment(name: str):
+    """只映射已有的共享内存，不登记到 resource_tracker（否则服务端退出时会删除客户端的共享内存）"""
+    shared_memory = _shared_memory()
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def attach(handle: Dict[str, Any]) -> Tuple[Any, Any]:
+    """按句柄映射共享内存，返回 (数组视图, 共享内存对象)；句柄无效时抛出 ValueError"""
+    dtype = handle.get("dtype", "float64")
+    if dtype not in DTYPES:
+        raise ValueError(f"不支持的 dtype: {dtype}")
+    shape = handle.get("shape")
+    if not isinstance(shape, list) or not all(isinstance(size, int) and size >= 0 for size in shape):
+        raise ValueError(f"共享数组的 shape 无效: {shape}")
+    fmt = DTYPES[dtype]
+    nbytes = _item_count(shape) * _itemsize(fmt)
+    try:
+        segment = _attach_segment(str(handle["name"]))
+    except (FileNotFoundError, ValueError) as e:
+        raise ValueError(f"无法打开共享数组 {handle['name']}: {str(e)}")
+    if segment.size < nbytes:
+        segment.close()
+        raise ValueError(f"共享数组 {handle['name']} 大小 {segment.size} 字节，小于 shape 所需的 {nbytes} 字节")
+
+    numpy = _load_numpy()
+    if numpy is not None:
+        view = numpy.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    else:
+        view = segment.buf[:nbytes].cast(fmt, shape)
+    return view, segment
+
+
+def attach_arguments(args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    把顶层参数中的共享数组句柄替换为视图，返回 (参数, 共享内存列表)；
+    没有句柄时原样返回参数，只做一次浅层扫描
+    """
+    segments: List[Any] = []
+    if not isinstance(args, dict):
+        return args, segments
+    attached = None
+    try:
+        for key, value in args.items():
+            if is_shared_array(value):
+                if attached is None:
+                    attached = dict(args)
+                attached[key], segment = attach(value)
+                segments.append(segment)
+    except Exception:
+        release(segments)
+        raise
+    return (attached if attached is not None else args), segments
+
+
+def release(segments: List[Any]) -> None:
+    """解除对共享内存的映射；仍有视图引用的留到下次释放时重试"""
+    pending = _lingering + list(segments)
+    _lingering.clear()
+    for segment in pending:
+        try:
+            segment.close()
+        except BufferError:
+            _lingering.append(segment)
@@ -0,0 +1,88 @@
+"""calculator_tools.evaluate（含乘方/乘积上限）与四则运算数值模式的直接测试"""
+
+from decimal import Decimal
+
+import pytest
+
+from calculator_tools import MAX_EXPONENT, MAX_INT_BITS, addition, division, evaluate, multiplication
+
+
+def calc(expression, **variables):
+    return evaluate({"expression": expression, "variables": variables})
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("2+3*4", 14),
+    ("(2+3)*4", 20),
+    ("10-4-3", 3),
+    ("2**3**2", 512),  # 乘方右结合
+    ("2^10", 1024),  # ^ 按乘方解析
+    ("7//2 + 7%3", 4),
+    ("10/4", 2.5),
+    ("（1＋2）×3÷4", 2.25),  # 全角符号
+])
+def test_precedence(expression, expected):
+    assert calc(expression) == expected
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("-2**2", -4),  # 负号的优先级低于乘方
+    ("--3", 3),
+    ("-(1+2)*3", -9),
+    ("2*-3", -6),
+    ("-x", -5),
+])
+def test_unary_minus(expression, expected):
+    assert calc(expression, x=5) == expected
+
+
+@pytest.mark.parametrize("expression", ["1/0", "1//0", "1%0", "0**-1", "1/(2-2)"])
+def test_division_by_zero(expression):
+    with pytest.raises(ValueError, match="除数不能为0"):
+        calc(expression)
+
+
+def test_oversized_exponent():
+    with pytest.raises(ValueError, match="指数过大"):
+        calc(f"2**{MAX_EXPONENT + 1}")
+    with pytest.raises(ValueError, match="乘方结果过大"):
+        calc(f"{2 ** 64}**{MAX_EXPONENT}")
+    assert calc(f"2**{MAX_EXPONENT}") == 2 ** MAX_EXPONENT
+
+
+def test_oversized_product():
+    factor = f"9**{MAX_EXPONENT - 1}"
+    factors = MAX_INT_BITS // (9 ** (MAX_EXPONENT - 1)).bit_length() + 1
+    with pytest.raises(ValueError, match="乘积过大"):
+        calc("*".join([factor] * factors))
+
+
+def test_batch_with_mixed_errors():
+    results = evaluate({"expressions": ["1+1", "1/0", "x*2", "1+", "y"], "variables": {"x": 3}})
+    assert results[0] == {"expression": "1+1", "result": 2}
+    assert results[1] == {"expression": "1/0", "error": "除数不能为0"}
+    assert results[2] == {"expression": "x*2", "result": 6}
+    assert "语法错误" in results[3]["error"]
+    assert results[4] == {"expression": "y", "error": "未定义的变量: y"}
+
+
+@pytest.mark.parametrize("args, message", [
+    ({}, "缺少参数"),
+    ({"expression": ""}, "不能为空"),
+    ({"expression": "__import__('os')"}, "不支持的函数调用"),
+    ({"expressions": "1+1"}, "字符串列表"),
+])
+def test_invalid_arguments(args, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate(args)
+
+
+@pytest.mark.parametrize("tool, args, expected", [
+    (multiplication, {"a": 12345, "b": 6789, "precision": 3}, Decimal("8.38E+7")),
+    (addition, {"a": 1, "b": 2, "mode": "decimal"}, Decimal(3)),
+    (division, {"a": 12, "b": 4, "mode": "decimal", "precision": 1}, Decimal(3)),
+    (multiplication, {"a": 12345, "b": 6789, "mode": "integer"}, 83810205),
+])
+def test_decimal_precision_applies_to_integer_operands(tool, args, expected):
+    result = tool(args)
+    assert result == expected and type(result) is type(expected)
@@ -0,0 +1,40 @@
+"""tools.json 中的 schemas 与工具说明须与 calculator_tools 中的常量保持一致"""
+
+import json
+import os
+
+import pytest
+
+import calculator_tools
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools.json")
+
+with open(MANIFEST_PATH, encoding="utf-8") as f:
+    MANIFEST = json.load(f)
+
+
+@pytest.mark.parametrize("name, constant", [
+    ("arithmetic_input", "ARITHMETIC_PARAMETERS"),
+    ("arithmetic_output", "ARITHMETIC_OUTPUT_SCHEMA"),
+    ("evaluate_input", "EVALUATE_PARAMETERS"),
+    ("evaluate_output", "EVALUATE_OUTPUT_SCHEMA"),
+    ("statistics_input", "STATISTICS_PARAMETERS"),
+    ("statistics_output", "STATISTICS_OUTPUT_SCHEMA"),
+])
+def test_schema_matches_constant(name, constant):
+    assert MANIFEST["schemas"][name] == getattr(calculator_tools, constant)
+
+
+def test_every_schema_is_checked():
+    assert set(MANIFEST["schemas"]) == {
+        f"{tool}_{kind}" for tool in ("arithmetic", "evaluate", "statistics") for kind in ("input", "output")
+    }
+
+
+@pytest.mark.parametrize("tool, constant", [
+    ("evaluate", "EVALUATE_DESCRIPTION"),
+    ("statistics", "STATISTICS_DESCRIPTION"),
+])
+def test_description_matches_constant(tool, constant):
+    entry = next(t for t in MANIFEST["tools"] if t["name"] == tool)
+    assert entry["description"] == getattr(calculator_tools, constant)
@@ -0,0 +1,90 @@
+"""
+从LLM回复中提取工具调用
+回复中的JSON可以在 ```json 代码块里、在说明文字之间，或者就是整条回复，都只需从左到右扫描一遍：
+  - 用正则跳到下一个可能是对象的位置（{" 、{} 或 [{，说明文字中的 {1, 2}、[2, 3] 不会被尝试解析），
+    从该位置用 json.JSONDecoder.raw_decode 解析一个完整的JSON值（C实现，自动匹配括号和字符串）
+  - 解析成功则跳过整个值继续扫描，失败则从下一个候选位置继续；JSON在回复末尾被截断时（包括截断在字符串、数字或
+    true/false/null 中间）停止扫描，不再解析其中已完整的内层对象，不执行不完整的调用
+  - 代码块的 ``` 标记只是普通文本，不需要单独处理；回复中没有 { 时（直接回答的常见情况）不做任何解析
+接受的工具调用格式（可混用）：
+  {"tool_calls": [{"tool_name": "addition", "parameters": {...}}]}          # 系统提示词约定的格式，tool_calls 也可以是单个对象
+  {"tool_calls": [{"type": "function", "function": {"name": ..., "arguments": "{...}"}}]}  # OpenAI 格式，arguments 可以是JSON字符串
+  {"name"/"tool_name"/"tool": ..., "arguments"/"parameters"/"args"/"input": {...}}           # 单个调用对象，也可以是调用对象的数组
+回复中出现 tool_calls 对象时只使用第一个（模型常在说明文字中重复一遍）；否则收集所有单个调用对象。
+单个调用对象与普通JSON（如回答中的 {"name": "张三"}）难以区分，给出 tool_names 时只接受调用已知工具的对象
+"""
+
+import json
+import re
+from typing import Dict, Any, Container, List, Optional
+
+_CANDIDATE = re.compile(r'\{\s*["}]|\[\s*\{')
+# 解析失败位置之后只剩被截断的数字或字面量（如 "1."、"tru"）：失败的值延伸到了回复末尾
+_TRUNCATED_TAIL = re.compile(r'\s*(?:[-+.\deE]+|t(?:ru?)?|f(?:a(?:ls?)?)?|n(?:ul?)?)?\s*\Z')
+_DECODER = json.JSONDecoder()
+
+_ARGUMENT_KEYS = ("parameters", "arguments", "args", "input")
+
+
+def normalize_call(item: Any) -> Optional[Dict[str, Any]]:
+    """把一个工具调用对象转换为 {"tool_name": ..., "parameters": {...}}，不是工具调用时返回None"""
+    if not isinstance(item, dict):
+        return None
+    function = item.get("function")
+    if isinstance(function, dict):
+        item = function
+    name = item.get("tool_name") or item.get("name") or item.get("tool")
+    if not name or not isinstance(name, str):
+        return None
+    arguments = None
+    for key in _ARGUMENT_KEYS:
+        if key in item:
+            arguments = item[key]
+            break
+    if arguments is None:
+        arguments = {}
+    elif isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        except ValueError:
+            return None
+    if not isinstance(arguments, dict):
+        return None
+    return {"tool_name": name, "parameters": arguments}
+
+
+def _calls(items: Any, tool_names: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+    calls = []
+    for item in items if isinstance(items, list) else [items]:
+        call = normalize_call(item)
+        if call is not None and (tool_names is None or call["tool_name"] in tool_names):
+            calls.append(call)
+    return calls
+
+
+def _truncated(text: str, error: json.JSONDecodeError) -> bool:
+    """解析失败是否因为JSON在回复末尾被截断：未闭合的字符串一直延伸到末尾，或失败位置之后只剩被截断的值"""
+    return error.msg.startswith("Unterminated string") or _TRUNCATED_TAIL.match(text, error.pos) is not None
+
+
+def extract_tool_calls(text: str, tool_names: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+    """提取回复中的工具调用，没有时返回空列表；tool_names 为已知工具名，只用于过滤单个调用对象"""
+    if not text or "{" not in text:
+        return []
+    found: List[Dict[str, Any]] = []
+    position = 0
+    while True:
+        match = _CANDIDATE.search(text, position)
+        if match is None:
+            return found
+        start = match.start()
+        try:
+            value, position = _DECODER.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            if _truncated(text, e):
+                return found  # 回复末尾的JSON不完整（输出被截断），其中的内层对象也不执行
+            position = start + 1
+            continue
+        if isinstance(value, dict) and "tool_calls" in value:
+            return _calls(value["tool_calls"])
+        found.extend(_calls(value, tool_names))
@@ -0,0 +1,76 @@
+"""
+工具检索索引：按查询从工具目录中选出最相关的若干个工具放入系统提示词
+基于 BM25，在本地CPU上由工具名、描述和参数（名称及描述）建立倒排索引，不依赖外部模型：
+  - 英文按单词切分（snake_case、camelCase 拆开，忽略纯数字），中文按单字和相邻双字切分
+  - 文档侧的 BM25 权重在建索引时预先算好，查询只需累加命中词的倒排项
+  - 没有工具得分达到 min_score（未命中）时返回 None，由调用方退回完整工具列表
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_TOKEN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    text = _CAMEL.sub(r"\1 \2", text).lower().replace("_", " ")
+    for word in _TOKEN.findall(text):
+        if "\u4e00" <= word[0] <= "\u9fff":
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif not word.isdigit():  # 纯数字（查询中的操作数）不参与检索
+            tokens.append(word)
+    return tokens
+
+
+def tool_text(tool: Dict[str, Any]) -> str:
+    """工具的检索文本：工具名（重复一次以提高权重）、描述、参数名及参数描述"""
+    parts = [tool.get("name", ""), tool.get("name", ""), tool.get("description") or ""]
+    properties = (tool.get("inputSchema") or {}).get("properties") or {}
+    for name, schema in properties.items():
+        parts.append(name)
+        if isinstance(schema, dict) and isinstance(schema.get("description"), str):
+            parts.append(schema["description"])
+    return " ".join(parts)
+
+
+class ToolIndex:
+    def __init__(self, tools: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75, min_score: float = 1.0):
+        self.tools = tools
+        self.min_score = min_score  # 最高得分低于该值视为未命中
+        documents = [Counter(tokenize(tool_text(tool))) for tool in tools]
+        lengths = [sum(document.values()) for document in documents]
+        average = sum(lengths) / len(lengths) if lengths else 0.0
+        frequencies = Counter(term for document in documents for term in document)
+        count = len(documents)
+
+        # 词 -> [(工具序号, 该词对该工具的BM25得分)]
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for position, (document, length) in enumerate(zip(documents, lengths)):
+            norm = k1 * (1 - b + b * length / average) if average else k1
+            for term, tf in document.items():
+                idf = math.log((count - frequencies[term] + 0.5) / (frequencies[term] + 0.5) + 1)
+                self._postings[term].append((position, idf * tf * (k1 + 1) / (tf + norm)))
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            for position, weight in self._postings.get(term, ()):
+                scores[position] += weight
+        return scores
+
+    def search(self, query: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """返回与查询最相关的至多 top_k 个工具（按工具目录顺序）；未命中时返回None"""
+        scores = self.scores(query)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        if not best or best[0][1] < self.min_score:
+            return None
+        return [self.tools[position] for position in sorted(position for position, _ in best)]
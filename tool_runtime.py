@@ -0,0 +1,186 @@
+"""
+工具执行运行时：取消令牌与可强制终止的工具执行
+  - CancelToken: 协作式取消令牌，工具函数声明 cancel_token 参数即可接收，在循环中检查以尽快退出
+  - run_tool:    按隔离方式执行工具。thread 在线程池中执行（超时/取消后只能等待工具自行检查令牌退出）；
+                 process 在独立子进程中执行，超时/取消时直接终止子进程，彻底回收CPU；
+                 async 为协程工具，直接在事件循环中 await，不占用线程，超时/取消时协程在当前等待点被取消
+  - stream_tool: 执行生成器/异步生成器工具，每产出一个分块回调一次，分块之间是天然的取消检查点
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+class ToolCancelled(Exception):
+    """工具执行被取消（客户端取消或超时）"""
+
+
+class CancelToken:
+    """线程安全的取消令牌"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self):
+        """在工具的循环中调用，已取消时抛出 ToolCancelled"""
+        if self._event.is_set():
+            raise ToolCancelled(self.reason or "cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """可取消的sleep：等待timeout秒，期间被取消则提前返回True"""
+        return self._event.wait(timeout)
+
+
+def accepts_cancel_token(function: Callable) -> bool:
+    """工具函数是否声明了 cancel_token 参数（或**kwargs）"""
+    try:
+        parameters = inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+    return "cancel_token" in parameters or any(
+        p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values()
+    )
+
+
+def _process_entry(function: Callable, args: Dict[str, Any], conn) -> None:
+    """子进程入口：执行工具并通过管道回传结果"""
+    try:
+        conn.send(("ok", function(args)))
+    except BaseException as e:  # 子进程内的任何异常都要回传给父进程
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+async def _run_in_process(function: Callable, args: Dict[str, Any]) -> Any:
+    # 延迟导入：只有使用进程隔离的工具才需要 multiprocessing
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    # fork 可以直接继承工具函数（包括lambda等无法pickle的对象），启动也更快
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_process_entry, args=(function, args, child_conn), daemon=True)
+    process.start()
+    child_conn.close()
+
+    loop = asyncio.get_running_loop()
+    try:
+        # 子进程被终止时管道关闭，recv 抛出 EOFError，等待线程随之释放
+        status, value = await loop.run_in_executor(None, parent_conn.recv)
+    except EOFError:
+        raise RuntimeError(f"工具进程异常退出（退出码: {process.exitcode}）")
+    finally:
+        if process.is_alive():
+            process.terminate()
+            await loop.run_in_executor(None, process.join, 1)
+            if process.is_alive():
+                process.kill()
+    # 正常返回后才关闭管道；取消时等待线程可能仍在 recv，交给其收到EOF后自行回收
+    parent_conn.close()
+
+    if status == "error":
+        raise ValueError(value)
+    return value
+
+
+async def run_tool(
+    function: Callable,
+    args: Dict[str, Any],
+    token: CancelToken,
+    isolation: str = "thread",
+    pass_token: Optional[bool] = None,
+) -> Any:
+    """
+    执行工具函数；被取消（asyncio 任务取消或 wait_for 超时）时设置令牌，
+    进程隔离的工具会被直接终止，协程工具在当前等待点被取消
+    """
+    if pass_token is None:
+        pass_token = accepts_cancel_token(function)
+    try:
+        if isolation == "async":
+            return await (function(args, cancel_token=token) if pass_token else function(args))
+        if isolation == "process":
+            return await _run_in_process(function, args)
+        call = functools.partial(function, args, cancel_token=token) if pass_token else functools.partial(function, args)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+    except asyncio.CancelledError:
+        token.cancel(token.reason or "cancelled")
+        raise
+
+
+def is_coroutine_tool(function: Callable) -> bool:
+    """工具函数是否为协程函数（async def），这类工具直接在事件循环中执行"""
+    return inspect.iscoroutinefunction(function) or inspect.iscoroutinefunction(getattr(function, "__call__", None))
+
+
+def is_streaming_tool(function: Callable) -> bool:
+    """工具函数是否为生成器或异步生成器（逐块产出结果）"""
+    return inspect.isgeneratorfunction(function) or inspect.isasyncgenfunction(function)
+
+
+def _next_chunk(generator) -> Tuple[bool, Any]:
+    """在线程中推进同步生成器一步，返回 (是否结束, 分块或返回值)"""
+    try:
+        return False, next(generator)
+    except StopIteration as e:
+        return True, e.value
+
+
+async def stream_tool(
+    function: Callable,
+    args: Dict[str, Any],
+    token: CancelToken,
+    on_chunk: Callable[[Any], None],
+    pass_token: Optional[bool] = None,
+    idle_timeout: Optional[float] = None,
+) -> Any:
+    """
+    执行流式工具，对每个产出的分块调用 on_chunk，返回生成器的返回值（异步生成器为None）
+    同步生成器每一步在线程池中执行，异步生成器直接在事件循环中迭代；
+    idle_timeout 限制相邻两个分块之间的等待时间，而不是整个工具的执行时间
+    """
+    if pass_token is None:
+        pass_token = accepts_cancel_token(function)
+    generator = function(args, cancel_token=token) if pass_token else function(args)
+    loop = asyncio.get_running_loop()
+    try:
+        if inspect.isasyncgen(generator):
+            while True:
+                token.raise_if_cancelled()
+                try:
+                    chunk = await asyncio.wait_for(generator.__anext__(), timeout=idle_timeout)
+                except StopAsyncIteration:
+                    return None
+                on_chunk(chunk)
+
+        while True:
+            token.raise_if_cancelled()
+            done, value = await asyncio.wait_for(
+                loop.run_in_executor(None, _next_chunk, generator), timeout=idle_timeout
+            )
+            if done:
+                return value
+            on_chunk(value)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        token.cancel(token.reason or "cancelled")
+        raise
+    finally:
+        # 停止后关闭生成器以执行其清理代码；同步生成器若仍在线程中执行，由令牌通知其退出
+        if inspect.isasyncgen(generator):
+            await generator.aclose()
+        elif not generator.gi_running:
+            generator.close()
@@ -0,0 +1,126 @@
+"""
+工具结果的带类型封装（服务端启动路径上使用，只依赖标准库中已加载的模块）
+  int_text/parse_int: 整数与十进制字符串互转，超过解释器的位数限制（默认4300位）时经 decimal 转换
+  typed_value:   把计算结果转换为带类型的JSON值（decimal/fraction/大整数不丢失类型和精度）
+  plain_value:   去掉类型包装，只保留值本身
+  render_result: 带类型结果的紧凑文本渲染
+  tool_result:   structuredContent（带类型的JSON）+ 紧凑文本块
+Decimal/Fraction 只在结果中出现时才会被识别：两者的模块已由产生结果的工具导入，这里不主动导入，
+服务端导入本模块时不会连带导入 decimal、fractions 或工具实现
+"""
+
+import json
+import math
+import sys
+from typing import Dict, Any
+
+# JSON数值在多数客户端（如JavaScript）中超过 2^53 会丢失精度，超出时以字符串返回
+MAX_SAFE_INTEGER = 2 ** 53
+# 可以输入和返回的整数位数上限。Python 3.11+ 默认只允许4300位以内的 int/str 转换（防止平方复杂度的转换被滥用），
+# 超过时改用 decimal 转换；10万位的转换耗时约0.1秒
+MAX_INTEGER_DIGITS = 100000
+_LOG10_2 = math.log10(2)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _loaded_type(module: str, name: str):
+    """已导入模块中的类型，模块未导入时返回None（此时结果中不可能有该类型的值）"""
+    loaded = sys.modules.get(module)
+    return getattr(loaded, name, None)
+
+
+def _str_digits_limit() -> int:
+    """解释器 int/str 转换的位数限制，0 表示不限制（Python 3.11 之前没有该限制）"""
+    get_limit = getattr(sys, "get_int_max_str_digits", None)
+    return get_limit() if get_limit is not None else 0
+
+
+def int_text(value: int) -> str:
+    """整数的十进制字符串，超过 MAX_INTEGER_DIGITS 位时报错"""
+    digits = int(value.bit_length() * _LOG10_2) + 1  # 不小于实际位数
+    if digits > MAX_INTEGER_DIGITS:
+        raise ValueError(f"整数结果过大（上限 {MAX_INTEGER_DIGITS} 位）")
+    limit = _str_digits_limit()
+    if not limit or digits <= limit:
+        return str(value)
+    import decimal
+    return str(decimal.Decimal(value))
+
+
+def parse_int(text: str) -> int:
+    """十进制字符串转整数（可带正负号），超过 MAX_INTEGER_DIGITS 位时报错"""
+    text = text.strip()
+    digits = text[1:] if text[:1] in ("+", "-") else text
+    if len(digits) > MAX_INTEGER_DIGITS:
+        raise ValueError(f"整数位数过多（上限 {MAX_INTEGER_DIGITS} 位）")
+    limit = _str_digits_limit()
+    if not limit or len(digits) <= limit:
+        return int(text)
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"无效的整数: {text[:20]}...")
+    import decimal
+    return int(decimal.Decimal(text))
+
+
+def typed_value(value: Any) -> Any:
+    """把计算结果转换为带类型的JSON值，避免 str() 后丢失类型和精度"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if _is_int(value):
+        return {"type": "integer", "value": value if abs(value) <= MAX_SAFE_INTEGER else int_text(value)}
+    if isinstance(value, float):
+        return {"type": "float", "value": value if math.isfinite(value) else str(value)}
+    if isinstance(value, dict):
+        return {k: typed_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [typed_value(v) for v in value]
+    decimal_type = _loaded_type("decimal", "Decimal")
+    if decimal_type is not None and isinstance(value, decimal_type):
+        return {"type": "decimal", "value": str(value)}
+    fraction_type = _loaded_type("fractions", "Fraction")
+    if fraction_type is not None and isinstance(value, fraction_type):
+        try:
+            approx = float(value)
+        except OverflowError:
+            approx = None
+        numerator, denominator = int_text(value.numerator), int_text(value.denominator)
+        return {"type": "fraction",
+                "value": numerator if value.denominator == 1 else f"{numerator}/{denominator}",
+                "numerator": typed_value(value.numerator)["value"],
+                "denominator": typed_value(value.denominator)["value"],
+                "approx": approx}
+    return str(value)
+
+
+def plain_value(value: Any) -> Any:
+    """去掉 typed_value 的类型包装，只保留值本身，用于紧凑文本"""
+    if isinstance(value, dict):
+        if "type" in value and "value" in value:
+            return value["value"]
+        return {k: plain_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [plain_value(v) for v in value]
+    return value
+
+
+def render_result(structured: Any) -> str:
+    """把带类型的结果渲染为紧凑文本：标量直接输出值，其余输出无多余空白的JSON"""
+    plain = plain_value(structured)
+    if isinstance(plain, str):
+        return plain
+    return json.dumps(plain, ensure_ascii=False, separators=(",", ":"))
+
+
+def tool_result(result: Any) -> Dict[str, Any]:
+    """
+    工具调用结果：structuredContent 保存带类型的结果（decimal/fraction/大整数等不会丢失类型），
+    content 文本块是同一结果的紧凑渲染（兼容只读取文本的客户端），结果只转换一次
+    """
+    structured = {"result": typed_value(result)}
+    return {
+        "content": [{"type": "text", "text": render_result(structured["result"])}],
+        "structuredContent": structured,
+    }